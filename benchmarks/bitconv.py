@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import time
+import random
+import argparse
+
+from ide import bitconv
+from ide.format import duration_short
+
+
+def timed(func, *args):
+	start = time.perf_counter()
+	result = func(*args)
+	return result, time.perf_counter() - start
+
+
+def scalar_pack(values, size_in_bytes: int, byteorder: str, signed: bool):
+	# The scalar functions are little endian, big endian output reverses each value
+	pack = bitconv.pack_int if signed else bitconv.pack_uint
+	if byteorder == ">":
+		return b"".join(bytes(reversed(pack(n, size_in_bytes))) for n in values)
+	return b"".join(pack(n, size_in_bytes) for n in values)
+
+
+def scalar_unpack(data, size_in_bytes: int, byteorder: str, signed: bool):
+	unpack = bitconv.unpack_int if signed else bitconv.unpack_uint
+	chunks = (data[i:i + size_in_bytes] for i in range(0, len(data), size_in_bytes))
+	if byteorder == ">":
+		return [unpack(reversed(chunk)) for chunk in chunks]
+	return [unpack(chunk) for chunk in chunks]
+
+
+def random_values(rng, count: int, size_in_bytes: int, signed: bool):
+	bits = size_in_bytes * 8
+	bias = 1 << (bits - 1) if signed else 0
+	return [rng.getrandbits(bits) - bias for _ in range(count)]
+
+
+if __name__ == "__main__":
+	# Correctness is checked by tests/test_bitconv.py, this only times the batch functions against the scalar ones
+	parser = argparse.ArgumentParser(description="Times batch and scalar conversions in ide.bitconv.")
+	parser.add_argument("-n", "--count", type=int, default=1 << 18, help="Values per run")
+	parser.add_argument("-w", "--widths", default="1,2,3,4,5,6,7,8,16", help="Comma separated widths in bytes")
+
+	args = parser.parse_args()
+
+	rng = random.Random(0)
+
+	for size_in_bytes in map(int, args.widths.split(",")):
+		for signed in (False, True):
+			values = random_values(rng, args.count, size_in_bytes, signed)
+			pack = bitconv.pack_ints if signed else bitconv.pack_uints
+			unpack = bitconv.unpack_ints if signed else bitconv.unpack_uints
+
+			for byteorder in ("<", ">"):
+				packed, pack_time = timed(pack, values, size_in_bytes, byteorder)
+				scalar_packed, scalar_pack_time = timed(scalar_pack, values, size_in_bytes, byteorder, signed)
+				_, unpack_time = timed(unpack, packed, size_in_bytes, byteorder)
+				_, scalar_unpack_time = timed(scalar_unpack, scalar_packed, size_in_bytes, byteorder, signed)
+
+				mb = args.count * size_in_bytes / 1e6
+				kind = f"{'int' if signed else 'uint'}{size_in_bytes * 8} {byteorder}"
+				print(f"{kind:>9}  pack {mb / pack_time:>8.1f} MB/s ({scalar_pack_time / pack_time:>5.1f}x)  "
+					  f"unpack {mb / unpack_time:>8.1f} MB/s ({scalar_unpack_time / unpack_time:>5.1f}x)  "
+					  f"scalar {duration_short(scalar_pack_time + scalar_unpack_time):>10}")
+
+	floats = [rng.random() for _ in range(args.count)]
+	for size_in_bytes in (4, 8):
+		for byteorder in ("<", ">"):
+			scalar = getattr(bitconv, ("pack_float" if size_in_bytes == 4 else "pack_double") + ("_le" if byteorder == "<" else "_be"))
+			_, pack_time = timed(bitconv.pack_floats, floats, size_in_bytes, byteorder)
+			_, scalar_pack_time = timed(lambda: b"".join(scalar(x) for x in floats))
+
+			mb = args.count * size_in_bytes / 1e6
+			print(f"  float{size_in_bytes * 8} {byteorder}  pack {mb / pack_time:>8.1f} MB/s ({scalar_pack_time / pack_time:>5.1f}x)")
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+import gc
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from pathlib import Path
+
+from ide.format import file_size, duration_short
+from ide.lexing import lexer, lexer2
+from ide.lexing.parallel import ParallelLexer
+from ide.lexing.token import TokenType
+
+
+root = Path(__file__).resolve().parent.parent
+
+sizes = {"1K": 1 << 10, "1M": 1 << 20, "100M": 100 << 20}
+
+# Engines building a list of Token objects, hundreds of bytes a token, skipped past list_size_limit unless asked for
+list_engines = {"lexer.tokens", "lexer2.tokens"}
+list_size_limit = 16 << 20
+
+operators = ("**=", "//=", ">>=", "<<=", "==", "!=", "<=", ">=", "+=", "-=", "*=", "/=", "->", "**", "//",
+			 "=", "+", "-", "*", "/", "%", "<", ">", "&", "|", "^", "~", "@")
+separators = ("(", ")", "[", "]", "{", "}", ",", ":", ".", ";")
+
+patterns = (
+	(TokenType.Newline, r"\r?\n"),
+	(TokenType.Whitespace, r"[ \t\f]+"),
+	(TokenType.Comment, r"#[^\r\n]*"),
+	(TokenType.String, r"\"(?:[^\"\\\r\n]|\\.)*\"|'(?:[^'\\\r\n]|\\.)*'"),
+	(TokenType.Number, r"\d+(?:\.\d*)?(?:[eE][+-]?\d+)?"),
+	(TokenType.Identifier, r"[A-Za-z_][A-Za-z0-9_]*"),
+)
+
+
+def create_contexts():
+	context = lexer.LexerContext()
+	for token_type, pattern in patterns:
+		context.add_pattern(token_type, pattern)
+	context.add_symbols(TokenType.Operator, *operators)
+	context.add_symbols(TokenType.Separator, *separators)
+
+	context2 = lexer2.LexerContext()
+	for token_type, pattern in patterns:
+		context2.add_pattern(token_type, pattern)
+	context2.add_patterns(TokenType.Operator, *(re.escape(op) for op in operators))
+	context2.add_patterns(TokenType.Separator, *(re.escape(sep) for sep in separators))
+
+	return context, context2
+
+
+def engines():
+	context, context2 = create_contexts()
+
+	return {
+		"lexer.tokens": lambda text: list(lexer.Lexer(context, text).tokens()),
+		"lexer.table": lambda text: lexer.Lexer(context, text).table(),
+		"lexer2.tokens": lambda text: list(lexer2.Lexer(context2, text).tokens()),
+		"lexer2.table": lambda text: lexer2.Lexer(context2, text).table(),
+		"parallel.table": lambda text: ParallelLexer(context2, text).table(),
+	}
+
+
+def repeat_to_size(text: str, size: int):
+	if not text:
+		return ""
+	return (text * (size // len(text) + 1))[:size]
+
+
+def synthetic_source(size: int, seed: int = 0):
+	rng = random.Random(seed)
+	names = ["value", "index", "self", "data", "result", "token", "x", "y", "i", "n"]
+
+	lines = []
+	length = 0
+	while length < size:
+		depth = rng.randrange(4)
+		kind = rng.randrange(5)
+		if kind == 0:
+			line = f"def {rng.choice(names)}_{rng.randrange(1000)}({rng.choice(names)}, {rng.choice(names)}={rng.randrange(100)}):"
+		elif kind == 1:
+			line = f"{rng.choice(names)} = {rng.choice(names)}[{rng.randrange(64)}] + {rng.random():.4f}"
+		elif kind == 2:
+			line = f"# {' '.join(rng.choice(names) for _ in range(rng.randrange(1, 8)))}"
+		elif kind == 3:
+			line = f"{rng.choice(names)}.append(\"{rng.choice(names)} {rng.randrange(10000)}\")"
+		else:
+			line = f"if {rng.choice(names)} >= {rng.randrange(100)} and not {rng.choice(names)}:"
+
+		line = "\t" * depth + line + "\n"
+		lines.append(line)
+		length += len(line)
+
+	return "".join(lines)[:size]
+
+
+def real_source(size: int):
+	text = "".join(path.read_text("utf-8") for path in sorted((root / "ide").rglob("*.py")))
+	return repeat_to_size(text, size)
+
+
+def long_strings(size: int):
+	return repeat_to_size("x = \"" + "a" * 4096 + "\"\n", size)
+
+
+def binary_noise(size: int, seed: int = 0):
+	rng = random.Random(seed)
+	return repeat_to_size(bytes(rng.randrange(256) for _ in range(min(size, 1 << 16))).decode("latin-1"), size)
+
+
+def deep_nesting(size: int):
+	depth = 256
+	return repeat_to_size("f" + "(" * depth + "x" + ")" * depth + "\n", size)
+
+
+corpora = {
+	"synthetic": synthetic_source,
+	"real": real_source,
+	"long-strings": long_strings,
+	"binary-noise": binary_noise,
+	"deep-nesting": deep_nesting,
+}
+
+
+def measure(func, text: str, repeat: int):
+	gc.collect()
+
+	best = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		func(text)
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+
+	# Memory is measured on a separate run, tracemalloc slows everything down.
+	# CPython has no count of allocations made, tracemalloc and sys.getallocatedblocks only see live blocks,
+	# so what's reported is the blocks the result still holds. Temporaries freed along the way only show
+	# in the peak.
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot()
+	result = func(text)
+	_, peak = tracemalloc.get_traced_memory()
+	after = tracemalloc.take_snapshot()
+	tracemalloc.stop()
+	blocks = max(sum(stat.count_diff for stat in after.compare_to(before, "filename")), 0)
+
+	count = len(result)
+	del result
+
+	return {
+		"tokens": count,
+		"seconds": best,
+		"tokens_per_second": count / best if best else 0.0,
+		"mb_per_second": len(text) / 1e6 / best if best else 0.0,
+		"peak_memory": peak,
+		"retained_blocks_per_token": blocks / count if count else 0.0,
+	}
+
+
+def revision():
+	try:
+		return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root, text=True).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return "unknown"
+
+
+def compare(results, baseline, threshold: float):
+	regressions = []
+	for key, result in results.items():
+		old = baseline.get(key)
+		if old and old["tokens_per_second"] and result["tokens_per_second"] < old["tokens_per_second"] * (1 - threshold):
+			change = result["tokens_per_second"] / old["tokens_per_second"] - 1
+			regressions.append(f"{key}: {change:+.1%} tokens/s")
+
+	return regressions
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Benchmarks lexer.Lexer against lexer2.Lexer.")
+	parser.add_argument("-s", "--sizes", default="1K,1M", help=f"Comma separated corpus sizes ({', '.join(sizes)})")
+	parser.add_argument("-c", "--corpora", default=",".join(corpora), help="Comma separated corpus names")
+	parser.add_argument("-e", "--engines", default="", help="Comma separated engine names, all by default")
+	parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per measurement, the best is kept")
+	parser.add_argument("-o", "--output", help="Write results to this JSON file")
+	parser.add_argument("-b", "--baseline", help="Compare against results from an earlier run")
+	parser.add_argument("-t", "--threshold", type=float, default=0.1, help="Slowdown reported as a regression")
+	parser.add_argument("-l", "--lists", action="store_true",
+						help=f"Run {', '.join(sorted(list_engines))} past {file_size(list_size_limit)} too, 100M needs tens of GB")
+
+	args = parser.parse_args()
+
+	all_engines = engines()
+	engine_names = args.engines.split(",") if args.engines else list(all_engines)
+
+	results = {}
+	for size_name in args.sizes.split(","):
+		for corpus_name in args.corpora.split(","):
+			text = corpora[corpus_name](sizes[size_name])
+
+			for engine_name in engine_names:
+				key = f"{engine_name}/{corpus_name}/{size_name}"
+				if engine_name in list_engines and len(text) > list_size_limit and not args.lists:
+					print(f"{key:<36} skipped, pass --lists to run it")
+					continue
+
+				result = measure(all_engines[engine_name], text, args.repeat)
+				results[key] = result
+
+				print(f"{key:<36} {result['tokens']:>10} tokens  {duration_short(result['seconds']):>10}  "
+					  f"{result['tokens_per_second']:>12.0f} tok/s  {result['mb_per_second']:>7.2f} MB/s  "
+					  f"peak {file_size(result['peak_memory']):>10}  {result['retained_blocks_per_token']:.2f} retained blocks/tok")
+
+	if args.output:
+		with open(args.output, "w") as f:
+			json.dump({
+				"revision": revision(),
+				"python": platform.python_version(),
+				"platform": platform.platform(),
+				"results": results,
+			}, f, indent=2)
+
+	if args.baseline:
+		with open(args.baseline) as f:
+			baseline = json.load(f)
+
+		regressions = compare(results, baseline["results"], args.threshold)
+		for regression in regressions:
+			print(f"Regression against {baseline['revision']}: {regression}")
+
+		sys.exit(1 if regressions else 0)
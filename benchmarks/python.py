@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import io
+import sys
+import argparse
+import sysconfig
+import tokenize
+from pathlib import Path
+
+from ide.format import duration_short
+from ide.lang import Python
+from ide.lexing.lexer2 import Lexer
+
+from .lexing import sizes, measure
+
+
+def stdlib_source(size: int):
+	parts = []
+	length = 0
+	for path in sorted(Path(sysconfig.get_paths()["stdlib"]).glob("*.py")):
+		try:
+			text = path.read_text("utf-8")
+		except (OSError, UnicodeDecodeError):
+			continue
+
+		# Skip anything the stdlib tokenizer can't handle, so both sides lex the same corpus
+		try:
+			for _ in tokenize.generate_tokens(io.StringIO(text).readline):
+				pass
+		except (tokenize.TokenError, SyntaxError):
+			continue
+
+		parts.append(text if text.endswith("\n") else text + "\n")
+		length += len(parts[-1])
+		if length >= size:
+			break
+
+	text = "".join(parts)
+	if len(text) >= size:
+		return text
+
+	# Repeat whole files only, cutting one in half could leave an unterminated string
+	return text * (size // len(text) + 1)
+
+
+def engines():
+	context = Python.lexer()
+
+	return {
+		"python.table": lambda text: Lexer(context, text).table(),
+		"python.tokens": lambda text: list(Lexer(context, text).tokens()),
+		"tokenize": lambda text: list(tokenize.generate_tokens(io.StringIO(text).readline)),
+	}
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Benchmarks the Python language lexer against the tokenize module.")
+	parser.add_argument("-s", "--sizes", default="1M", help=f"Comma separated corpus sizes ({', '.join(sizes)})")
+	parser.add_argument("-r", "--repeat", type=int, default=3, help="Timed runs per measurement, the best is kept")
+	parser.add_argument("-t", "--target", type=float, default=2.0, help="Required speed-up of python.table over tokenize")
+
+	args = parser.parse_args()
+
+	all_engines = engines()
+
+	failed = False
+	for size_name in args.sizes.split(","):
+		text = stdlib_source(sizes[size_name])
+
+		results = {}
+		for engine_name, func in all_engines.items():
+			result = results[engine_name] = measure(func, text, args.repeat)
+			print(f"{engine_name:<14} {size_name:>5} {result['tokens']:>10} tokens  {duration_short(result['seconds']):>10}  "
+				  f"{result['mb_per_second']:>7.2f} MB/s")
+
+		# Token counts differ (tokenize has INDENT/DEDENT, this lexer has whitespace), so compare bytes per second
+		speedup = results["python.table"]["mb_per_second"] / results["tokenize"]["mb_per_second"]
+		print(f"python.table is {speedup:.2f}x tokenize (target {args.target:.2f}x)")
+		failed = failed or speedup < args.target
+
+	sys.exit(1 if failed else 0)
@@ -1,30 +1,148 @@
+import sys
+from array import array as _array
 from struct import pack as _pack, unpack_from as _unpack_from
 
 
 def pack_uint(n: int, size_in_bytes: int):
-	return bytearray((n >> (i * 8)) & 0xff for i in range(size_in_bytes))
+	return bytearray((n & ((1 << (size_in_bytes * 8)) - 1)).to_bytes(size_in_bytes, "little"))
 
 def pack_int(n: int, size_in_bytes: int):
-	k = 2 ** (size_in_bytes * 8)
-	if n < (k / 2):
-		n += k
 	return pack_uint(n, size_in_bytes)
 
 def unpack_uint(byte_iterable):
-	n = 0
-	i = 0
-	for byte in byte_iterable:
-		n += (byte << (i * 8))
-		i += 1
-
-	return n
+	return int.from_bytes(byte_iterable, "little")
 
 def unpack_int(byte_iterable):
-	n = unpack_uint(byte_iterable)
-	k = 2 ** (len(byte_iterable) * 8)
-	if n >= (k / 2):
-		n -= k
-	return n
+	return int.from_bytes(byte_iterable, "little", signed=True)
+
+
+# Batch conversions, byteorder is "=", "<" or ">" as in struct.
+# Widths up to 8 bytes go through array.array, wider ones through int.to_bytes/from_bytes.
+# Packing a value that doesn't fit raises OverflowError whatever the width, as array.array does.
+
+def _typecode(size_in_bytes: int, signed: bool):
+	for typecode in ("bhilq" if signed else "BHILQ"):
+		if _array(typecode).itemsize == size_in_bytes:
+			return typecode
+
+def _lane_typecode(size_in_bytes: int, signed: bool):
+	# Smallest array typecode wide enough to hold size_in_bytes, for odd widths such as 3 or 5
+	for typecode in ("bhilq" if signed else "BHILQ"):
+		if _array(typecode).itemsize >= size_in_bytes:
+			return typecode
+
+_sign_bytes = bytes(0xff if i & 0x80 else 0 for i in range(256))
+
+def _swap(byteorder: str):
+	return byteorder != "=" and (byteorder == "<") != (sys.byteorder == "little")
+
+def _order(byteorder: str):
+	return sys.byteorder if byteorder == "=" else ("little" if byteorder == "<" else "big")
+
+def _check_range(lanes, size_in_bytes: int, signed: bool):
+	# Lanes are wider than the values, so array.array doesn't catch values that only fit the lane
+	if not lanes:
+		return
+
+	bits = size_in_bytes * 8
+	low, high = (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if signed else (0, (1 << bits) - 1)
+	if min(lanes) < low or max(lanes) > high:
+		raise OverflowError(f"value out of range for a {'signed' if signed else 'unsigned'} {size_in_bytes} byte integer")
+
+def _pack_ints(values, size_in_bytes: int, byteorder: str, signed: bool):
+	typecode = _typecode(size_in_bytes, signed)
+	if typecode:
+		packed = _array(typecode, values)
+		if _swap(byteorder):
+			packed.byteswap()
+		return packed.tobytes()
+
+	typecode = _lane_typecode(size_in_bytes, signed)
+	if typecode:
+		# Pack into wider lanes, then gather the low bytes of every lane with strided slices
+		lanes = _array(typecode, values)
+		_check_range(lanes, size_in_bytes, signed)
+		if sys.byteorder == "big":
+			lanes.byteswap()
+		lanes = lanes.tobytes()
+
+		width = _array(typecode).itemsize
+		packed = bytearray(len(values) * size_in_bytes)
+		big_endian = _order(byteorder) == "big"
+		for j in range(size_in_bytes):
+			packed[(size_in_bytes - 1 - j if big_endian else j)::size_in_bytes] = lanes[j::width]
+		return bytes(packed)
+
+	order = _order(byteorder)
+	return b"".join(n.to_bytes(size_in_bytes, order, signed=signed) for n in values)
+
+def _unpack_ints(data, size_in_bytes: int, byteorder: str, signed: bool, offset: int, count: int):
+	view = memoryview(data).cast("B")
+	if count is None:
+		count = (len(view) - offset) // size_in_bytes
+	view = view[offset:offset + count * size_in_bytes]
+
+	typecode = _typecode(size_in_bytes, signed)
+	if typecode:
+		values = _array(typecode)
+		values.frombytes(view)
+		if _swap(byteorder):
+			values.byteswap()
+		return values
+
+	typecode = _lane_typecode(size_in_bytes, signed)
+	if typecode:
+		# Spread the bytes out into wider little endian lanes with strided slices, sign extending if needed
+		width = _array(typecode).itemsize
+		big_endian = _order(byteorder) == "big"
+
+		lanes = bytearray(count * width)
+		for j in range(size_in_bytes):
+			lanes[j::width] = view[(size_in_bytes - 1 - j if big_endian else j)::size_in_bytes]
+
+		if signed:
+			sign = bytes(lanes[size_in_bytes - 1::width]).translate(_sign_bytes)
+			for j in range(size_in_bytes, width):
+				lanes[j::width] = sign
+
+		values = _array(typecode)
+		values.frombytes(lanes)
+		if sys.byteorder == "big":
+			values.byteswap()
+		return values
+
+	order = _order(byteorder)
+	from_bytes = int.from_bytes
+	return [from_bytes(view[i:i + size_in_bytes], order, signed=signed) for i in range(0, len(view), size_in_bytes)]
+
+def pack_uints(values, size_in_bytes: int, byteorder: str = "="):
+	return _pack_ints(values, size_in_bytes, byteorder, False)
+
+def pack_ints(values, size_in_bytes: int, byteorder: str = "="):
+	return _pack_ints(values, size_in_bytes, byteorder, True)
+
+def unpack_uints(data, size_in_bytes: int, byteorder: str = "=", offset: int = 0, count: int = None):
+	return _unpack_ints(data, size_in_bytes, byteorder, False, offset, count)
+
+def unpack_ints(data, size_in_bytes: int, byteorder: str = "=", offset: int = 0, count: int = None):
+	return _unpack_ints(data, size_in_bytes, byteorder, True, offset, count)
+
+def pack_floats(values, size_in_bytes: int = 4, byteorder: str = "="):
+	packed = _array("f" if size_in_bytes == 4 else "d", values)
+	if _swap(byteorder):
+		packed.byteswap()
+	return packed.tobytes()
+
+def unpack_floats(data, size_in_bytes: int = 4, byteorder: str = "=", offset: int = 0, count: int = None):
+	view = memoryview(data).cast("B")
+	if count is None:
+		count = (len(view) - offset) // size_in_bytes
+
+	values = _array("f" if size_in_bytes == 4 else "d")
+	values.frombytes(view[offset:offset + count * size_in_bytes])
+	if _swap(byteorder):
+		values.byteswap()
+	return values
 
 
 def pack_uint8(n: int): return _pack("=B", n)
@@ -1,2 +1,4 @@
 from .bytestream import BytesInStream, BytesOutStream
 from .isbin import is_binary_string
+from .sniff import SniffResult, sniff, sniff_sample
+from .urlfetch import Fetch, HttpCache
@@ -1,32 +1,133 @@
-from io import BytesIO
+import sys
+from array import array as _array
+from mmap import mmap
+from struct import calcsize as _calcsize, iter_unpack as _iter_unpack, pack_into as _pack_into
 
 from ide.bitconv import *
 
 
 class BytesOutStream:
-	def __init__(self, output = BytesIO()):
-		self._data = output
+	# Writes into a preallocated bytearray that grows geometrically. With an output, everything before the
+	# cursor and before any reserved field is written out in blocks of block_size, so memory stays bounded.
+	def __init__(self, output = None, capacity: int = 1 << 16, block_size: int = 1 << 20):
+		self._output = output
+		self._block_size = block_size
+
+		self._buffer = bytearray(capacity)
+		self._length = 0
+		self._position = 0
+
+		# Bytes already written to the output, buffer offsets are relative to this
+		self._flushed = 0
+
+		# Absolute offsets of reserved fields not patched yet, pinned in the buffer until they are
+		self._reserved = set()
 
 	def getvalue(self):
-		return self._data.getvalue()
+		if self._output is not None:
+			# Reserved fields pin everything after them in the buffer, the output would come back cut short
+			if self._reserved:
+				offsets = ", ".join(map(str, sorted(self._reserved)))
+				raise ValueError(f"Cannot get the value with reserved fields at {offsets} not patched yet.")
+
+			# Only what's before the cursor goes out, the rest is still open to writes after seeking back
+			self.flush()
+			return self._output.getvalue() + self._buffer[:self._length]
+
+		return bytes(self._buffer[:self._length])
 
 	def close(self):
-		self._data.close()
+		self.flush(everything=True)
+		if self._output is not None:
+			self._output.close()
 
-	def flush(self):
-		self._data.flush()
+	def _flushable(self):
+		limit = min(self._length, self._position)
+		if self._reserved:
+			limit = min(limit, min(self._reserved) - self._flushed)
+		return limit
+
+	def flush(self, everything: bool = False):
+		if self._output is None:
+			return
+
+		limit = self._length if everything else self._flushable()
+		if limit > 0:
+			self._output.write(memoryview(self._buffer)[:limit])
+
+			remaining = self._length - limit
+			self._buffer[:remaining] = self._buffer[limit:self._length]
+			self._length = remaining
+			# Everything up to the cursor at least has gone out, a cursor seeked back is left at the start
+			self._position = max(self._position - limit, 0)
+			self._flushed += limit
+
+		self._output.flush()
 
 	def seek(self, offset):
-		self._data.seek(offset)
+		if offset < self._flushed:
+			raise ValueError(f"Cannot seek to {offset}, everything before {self._flushed} has been written out.")
+
+		self._position = offset - self._flushed
 
 	def tell(self):
-		return self._data.tell()
+		return self._flushed + self._position
 
 	def size(self):
-		return len(self._data.getvalue())
+		return self._flushed + self._length
+
+	def _claim(self, length: int):
+		# Makes room for length bytes at the cursor and returns where they go in the buffer
+		position = self._position
+		end = position + length
+
+		if end > len(self._buffer):
+			self._buffer.extend(bytes(max(end, 2 * len(self._buffer)) - len(self._buffer)))
+
+		if position > self._length:
+			self._buffer[self._length:position] = bytes(position - self._length)
+
+		self._position = end
+		if end > self._length:
+			self._length = end
+
+		return position
+
+	def _written(self, length: int):
+		if self._output is not None and self._length >= self._block_size and self._flushable() >= self._block_size:
+			self.flush()
+		return length
+
+	def _pack(self, fmt: str, size_in_bytes: int, n):
+		_pack_into(fmt, self._buffer, self._claim(size_in_bytes), n)
+		return self._written(size_in_bytes)
 
 	def bytes(self, data):
-		return self._data.write(data)
+		length = len(data)
+		position = self._claim(length)
+		self._buffer[position:position + length] = data
+		return self._written(length)
+
+	def reserve(self, length: int):
+		# Skips length zeroed bytes to be filled in later with patch(), returns their absolute offset
+		offset = self.tell()
+		position = self._claim(length)
+		self._buffer[position:position + length] = bytes(length)
+		self._reserved.add(offset)
+		self._written(length)
+		return offset
+
+	def patch(self, offset: int, data):
+		# Overwrites bytes at an earlier absolute offset without moving the cursor
+		if offset < self._flushed:
+			raise ValueError(f"Cannot patch {offset}, everything before {self._flushed} has been written out.")
+
+		position = offset - self._flushed
+		if position + len(data) > self._length:
+			raise ValueError(f"Cannot patch {len(data)} bytes at {offset}, only {self.size()} have been written.")
+
+		self._buffer[position:position + len(data)] = data
+		self._reserved.discard(offset)
 
 	def uint(self, n: int, size_in_bytes: int):
 		return self.bytes(pack_uint(n, size_in_bytes))
@@ -35,47 +136,46 @@ class BytesOutStream:
 		return self.bytes(pack_int(n, size_in_bytes))
 
 	def uint8(self, n: int):
-		return self.bytes(pack_uint8(n))
+		return self._pack("=B", 1, n)
 
 	def int8(self, n: int):
-		return self.bytes(pack_int8(n))
+		return self._pack("=b", 1, n)
 
 	def uint16(self, n: int):
-		return self.bytes(pack_uint16(n))
+		return self._pack("=H", 2, n)
 
 	def int16(self, n: int):
-		return self.bytes(pack_int16(n))
+		return self._pack("=h", 2, n)
 
 	def uint32(self, n: int):
-		return self.bytes(pack_uint32(n))
+		return self._pack("=I", 4, n)
 
 	def int32(self, n: int):
-		return self.bytes(pack_int32(n))
+		return self._pack("=i", 4, n)
 
 	def uint64(self, n: int):
-		return self.bytes(pack_uint64(n))
+		return self._pack("=Q", 8, n)
 
 	def int64(self, n: int):
-		return self.bytes(pack_int64(n))
+		return self._pack("=q", 8, n)
 
 	def float(self, n: float):
-		return self.bytes(pack_float(n))
+		return self._pack("=f", 4, n)
 
 	def double(self, n: float):
-		return self.bytes(pack_double(n))
+		return self._pack("=d", 8, n)
 
 	def uleb128(self, n: int):
-		out = bytearray()
-		while True:
-			byte = n & 0x7f
+		length = max((n.bit_length() + 6) // 7, 1)
+
+		buffer = self._buffer
+		position = self._claim(length)
+		for i in range(position, position + length - 1):
+			buffer[i] = (n & 0x7f) | 0x80
 			n >>= 7
-			out.append(byte)
-			if n:
-				out[-1] |= 0x80
-			else:
-				break
+		buffer[position + length - 1] = n
 
-		return self.bytes(out)
+		return self._written(length)
 
 	def string(self, text: str, encoding = "utf-8"):
 		data = bytes(text, encoding)
@@ -84,76 +184,124 @@ class BytesOutStream:
 
 
 class BytesInStream:
+	# Cursor over any buffer (bytes, bytearray, mmap, memoryview), values are decoded in place with no copies.
+	# File-like objects are read into memory first unless they can expose their buffer.
 	def __init__(self, data):
-		self._data = data
+		self._source = data
+		self._position = 0
+
+		if hasattr(data, "getbuffer"):
+			data = data.getbuffer()
+		elif hasattr(data, "read") and not isinstance(data, mmap):
+			data = data.read()
+
+		self._data = memoryview(data).cast("B")
 
 	def close(self):
-		self._data.close()
+		self._data.release()
+		if hasattr(self._source, "close"):
+			self._source.close()
 
 	def flush(self):
-		self._data.flush()
+		pass
 
 	def seek(self, offset):
-		self._data.seek(offset)
+		self._position = offset
 
 	def tell(self):
-		return self._data.tell()
+		return self._position
 
 	def size(self):
 		return len(self._data)
 
+	def remaining(self):
+		return len(self._data) - self._position
+
+	def _advance(self, length):
+		position = self._position
+		if position + length > len(self._data):
+			raise EOFError(f"Attempted to read {length} bytes at {position}, only {len(self._data) - position} left.")
+
+		self._position = position + length
+		return position
+
+	def view(self, length):
+		position = self._advance(length)
+		return self._data[position:position + length]
+
 	def bytes(self, length):
-		return self._data.read(length)
+		return self.view(length).tobytes()
 
 	def uint(self, size_in_bytes: int):
-		return unpack_uint(self.bytes(size_in_bytes))
+		return unpack_uint(self.view(size_in_bytes))
 
 	def int(self, size_in_bytes: int):
-		return unpack_int(self.bytes(size_in_bytes))
+		return unpack_int(self.view(size_in_bytes))
 
 	def uint8(self):
-		return unpack_uint8(self.bytes(1))
+		return unpack_uint8(self._data, self._advance(1))
 
 	def int8(self):
-		return unpack_int8(self.bytes(1))
+		return unpack_int8(self._data, self._advance(1))
 
 	def uint16(self):
-		return unpack_uint16(self.bytes(2))
+		return unpack_uint16(self._data, self._advance(2))
 
 	def int16(self):
-		return unpack_int16(self.bytes(2))
+		return unpack_int16(self._data, self._advance(2))
 
 	def uint32(self):
-		return unpack_uint32(self.bytes(4))
+		return unpack_uint32(self._data, self._advance(4))
 
 	def int32(self):
-		return unpack_int32(self.bytes(4))
+		return unpack_int32(self._data, self._advance(4))
 
 	def uint64(self):
-		return unpack_uint64(self.bytes(8))
+		return unpack_uint64(self._data, self._advance(8))
 
 	def int64(self):
-		return unpack_int64(self.bytes(8))
+		return unpack_int64(self._data, self._advance(8))
 
 	def float(self):
-		return unpack_float(self.bytes(4))
+		return unpack_float(self._data, self._advance(4))
 
 	def double(self):
-		return unpack_double(self.bytes(8))
+		return unpack_double(self._data, self._advance(8))
 
 	def uleb128(self):
+		data = self._data
+		size = len(data)
+		position = self._position
+
 		value = 0
 		shift = 0
-		while not self.size() > self.tell():
-			byte = self.bytes(1)[0]
+		while position < size:
+			byte = data[position]
+			position += 1
+
 			value |= (byte & 0x7f) << shift
 			if byte & 0x80:
 				shift += 7
 			else:
 				break
 
+		self._position = position
 		return value
 
 	def string(self, encoding = "utf-8"):
 		length = self.uleb128()
-		return self.bytes(length).decode(encoding)
+		return str(self.view(length), encoding)
+
+	def array(self, typecode: str, count: int, byteorder: str = "="):
+		# count fixed-width values as an array.array, byteorder is "=", "<" or ">" as in struct
+		values = _array(typecode)
+		values.frombytes(self.view(values.itemsize * count))
+
+		if byteorder != "=" and (byteorder == "<") != (sys.byteorder == "little"):
+			values.byteswap()
+
+		return values
+
+	def iter_unpack(self, fmt: str, count: int):
+		# count records of a struct format, decoded lazily straight from the buffer
+		return _iter_unpack(fmt, self.view(_calcsize(fmt) * count))
@@ -0,0 +1,101 @@
+import codecs
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from .isbin import is_binary_string
+
+
+sample_size = 4096
+
+_boms = (
+	(codecs.BOM_UTF32_LE, "utf-32-le"),
+	(codecs.BOM_UTF32_BE, "utf-32-be"),
+	(codecs.BOM_UTF8, "utf-8"),
+	(codecs.BOM_UTF16_LE, "utf-16-le"),
+	(codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# (offset, magic, format, kind)
+_magic = (
+	(0, b"\x89PNG\r\n\x1a\n", "png", "image"),
+	(0, b"\xff\xd8\xff", "jpeg", "image"),
+	(0, b"GIF87a", "gif", "image"),
+	(0, b"GIF89a", "gif", "image"),
+	(0, b"BM", "bmp", "image"),
+	(0, b"\x00\x00\x01\x00", "ico", "image"),
+	(0, b"II*\x00", "tiff", "image"),
+	(0, b"MM\x00*", "tiff", "image"),
+	(8, b"WEBP", "webp", "image"),
+	(0, b"%PDF-", "pdf", "binary"),
+	(0, b"PK\x03\x04", "zip", "binary"),
+	(0, b"\x1f\x8b", "gzip", "binary"),
+	(0, b"BZh", "bzip2", "binary"),
+	(0, b"\xfd7zXZ\x00", "xz", "binary"),
+	(0, b"7z\xbc\xaf\x27\x1c", "7z", "binary"),
+	(257, b"ustar", "tar", "binary"),
+	(0, b"\x7fELF", "elf", "binary"),
+	(0, b"MZ", "pe", "binary"),
+	(0, b"\xcf\xfa\xed\xfe", "mach-o", "binary"),
+	(0, b"\xce\xfa\xed\xfe", "mach-o", "binary"),
+	(0, b"SQLite format 3\x00", "sqlite", "binary"),
+)
+
+
+class SniffResult(NamedTuple):
+	# "text", "image" or "binary"
+	kind: str
+
+	# Name of the recognised magic number, if any
+	format: str
+
+	# Text encoding and the length of its byte order mark, None and 0 for non-text
+	encoding: str
+	bom: int
+
+	# First sample_size bytes of the file, the whole file when complete is set
+	sample: bytes
+	size: int
+	complete: bool
+
+
+def sniff_sample(sample: bytes, size: int = None):
+	if size is None:
+		size = len(sample)
+	complete = len(sample) >= size
+
+	for offset, magic, name, kind in _magic:
+		if sample.startswith(magic, offset):
+			# BM and MZ are short enough to start plain text, only trust them on binary looking data
+			if len(magic) > 2 or is_binary_string(sample):
+				return SniffResult(kind, name, None, 0, sample, size, complete)
+
+	for bom, encoding in _boms:
+		if sample.startswith(bom):
+			return SniffResult("text", None, encoding, len(bom), sample, size, complete)
+
+	# A multi-byte character may be cut off at the end of the sample, only a complete sample has to finish cleanly
+	try:
+		codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+	except UnicodeDecodeError:
+		pass
+	else:
+		if b"\x00" not in sample:
+			return SniffResult("text", None, "utf-8", 0, sample, size, complete)
+
+	if not is_binary_string(sample):
+		return SniffResult("text", None, "latin-1", 0, sample, size, complete)
+
+	return SniffResult("binary", None, None, 0, sample, size, complete)
+
+
+@lru_cache(maxsize=4096)
+def _sniff(path: str, size: int, mtime: int):
+	with open(path, "rb") as f:
+		return sniff_sample(f.read(sample_size), size)
+
+
+def sniff(path):
+	# Cached by path, size and modification time, so unchanged files are only read once
+	stat = Path(path).stat()
+	return _sniff(str(path), stat.st_size, stat.st_mtime_ns)
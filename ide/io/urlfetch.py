@@ -0,0 +1,201 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds
+timeout = (5, 30)
+
+chunk_size = 1 << 16
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def session():
+	# One session for the whole process, so connections to the same host are reused
+	global _session
+
+	with _session_lock:
+		if _session is None:
+			_session = requests.Session()
+
+			adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=1)
+			_session.mount("http://", adapter)
+			_session.mount("https://", adapter)
+
+		return _session
+
+
+class HttpCache:
+	# Response bodies on disk, with the validators needed to revalidate them. Entries are written to
+	# a temporary file while downloading and only replace the old ones once complete.
+	def __init__(self, directory):
+		self._directory = Path(directory)
+
+	def directory(self):
+		return self._directory
+
+	def _paths(self, url: str):
+		key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+		return self._directory / (key + ".json"), self._directory / (key + ".body")
+
+	def lookup(self, url: str):
+		# Metadata for a cached url or None
+		meta_path, body_path = self._paths(url)
+		try:
+			with meta_path.open("r", encoding="utf-8") as f:
+				meta = json.load(f)
+		except (OSError, ValueError):
+			return None
+
+		if meta.get("url") != url or not body_path.is_file():
+			return None
+
+		return meta
+
+	def body(self, url: str):
+		return self._paths(url)[1]
+
+	def validators(self, url: str):
+		# Headers for a conditional request
+		meta = self.lookup(url)
+		headers = {}
+		if meta:
+			if meta.get("etag"):
+				headers["If-None-Match"] = meta["etag"]
+			if meta.get("last_modified"):
+				headers["If-Modified-Since"] = meta["last_modified"]
+		return headers
+
+	def writer(self, url: str, response):
+		return _CacheWriter(self, url, response)
+
+
+class _CacheWriter:
+	def __init__(self, cache: HttpCache, url: str, response):
+		self._cache = cache
+		self._url = url
+		self._meta = {
+			"url": url,
+			"etag": response.headers.get("ETag"),
+			"last_modified": response.headers.get("Last-Modified"),
+			"content_type": response.headers.get("Content-Type"),
+		}
+
+		cache.directory().mkdir(parents=True, exist_ok=True)
+		fd, name = tempfile.mkstemp(dir=cache.directory(), suffix=".part")
+		self._file = os.fdopen(fd, "wb")
+		self._name = name
+
+	def write(self, data: bytes):
+		self._file.write(data)
+
+	def commit(self):
+		self._file.close()
+
+		meta_path, body_path = self._cache._paths(self._url)
+		os.replace(self._name, body_path)
+		with meta_path.open("w", encoding="utf-8") as f:
+			json.dump(self._meta, f)
+
+	def discard(self):
+		self._file.close()
+		try:
+			os.unlink(self._name)
+		except OSError:
+			pass
+
+
+class Fetch:
+	# Streams a url, from the cache when the server says it hasn't changed. Iterating yields the body
+	# in chunks; headers, content type and whether it came from the cache are known once it has started.
+	def __init__(self, url: str, cache: HttpCache = None):
+		self._url = url
+		self._cache = cache
+		self.cached = False
+		self.content_type = None
+		self.size = None
+
+	def __iter__(self):
+		cache = self._cache
+		headers = cache.validators(self._url) if cache else {}
+
+		if headers:
+			with self._get(headers) as r:
+				if r.status_code != requests.codes.not_modified:
+					yield from self._receive(r)
+					return
+
+				cached = self._open_cached()
+				if cached is not None:
+					meta, f = cached
+					with f:
+						self.cached = True
+						self.content_type = meta.get("content_type")
+						self.size = os.fstat(f.fileno()).st_size
+
+						data = f.read(chunk_size)
+						while data:
+							yield data
+							data = f.read(chunk_size)
+					return
+
+				logger.info(f"Cache entry for '{self._url}' went missing, requesting it again.")
+
+		with self._get({}) as r:
+			yield from self._receive(r)
+
+	def _get(self, headers: dict):
+		r = session().get(self._url, headers=headers, stream=True, timeout=timeout)
+		logger.info(f"Request to '{self._url}': status {r.status_code}, time taken {r.elapsed}.")
+		return r
+
+	def _open_cached(self):
+		# (metadata, open body) of the cache entry, or None if either has gone since the request was sent
+		meta = self._cache.lookup(self._url)
+		if meta is None:
+			return None
+
+		try:
+			return meta, self._cache.body(self._url).open("rb")
+		except OSError:
+			return None
+
+	def _receive(self, r):
+		r.raise_for_status()
+
+		self.content_type = r.headers.get("Content-Type")
+		self.size = int(r.headers["Content-Length"]) if "Content-Length" in r.headers else None
+
+		cache = self._cache
+		cacheable = cache and (r.headers.get("ETag") or r.headers.get("Last-Modified"))
+		writer = cache.writer(self._url, r) if cacheable else None
+		try:
+			for data in r.iter_content(chunk_size):
+				if writer:
+					writer.write(data)
+				yield data
+		except BaseException:
+			if writer:
+				writer.discard()
+			raise
+		else:
+			if writer:
+				writer.commit()
+
+	def charset(self):
+		# Charset named in the Content-Type header, if any
+		for parameter in (self.content_type or "").split(";")[1:]:
+			name, _, value = parameter.strip().partition("=")
+			if name.lower() == "charset" and value:
+				return value.strip("\"'")
@@ -1,2 +1,2 @@
-from .language import Language, languages, language_extensions
+from .language import Language, languages, language_extensions, detect_language
 from .python import Python
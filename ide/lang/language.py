@@ -1,4 +1,5 @@
 import logging
+from pathlib import PurePath
 from typing import Iterable
 from abc import abstractmethod
 
@@ -6,6 +7,9 @@ from abc import abstractmethod
 languages = {}
 language_extensions = []
 
+# Lowercase suffix to language, first registration wins
+_suffix_index = {}
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +27,9 @@ class Language:
 			logger.debug(f"Registered language '{name}' with extensions {', '.join(map(repr, extensions))}.")
 			languages[name.lower()] = cls
 			language_extensions.extend(extensions)
+
+			for extension in extensions:
+				_suffix_index.setdefault(extension.lower(), cls)
 		else:
 			logger.error(f"Conflict with languages: '{name}' already exists in registry.")
 
@@ -36,3 +43,13 @@ class Language:
 	@abstractmethod
 	def parser():
 		pass
+
+	@staticmethod
+	@abstractmethod
+	def keywords():
+		pass
+
+
+def detect_language(name: str):
+	return _suffix_index.get(PurePath(name).suffix.lower())
+
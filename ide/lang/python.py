@@ -1,11 +1,73 @@
+import re
+
 from .language import Language
+from ide.lexing.keyword import KeywordType, KeywordTable
+from ide.lexing.lexer2 import LexerContext
+from ide.lexing.token import TokenType
+
+
+# Keyword versions are major * 100 + minor, e.g. 310 for Python 3.10
+_keywords = KeywordTable()
+_keywords.add_keywords(KeywordType.ControlFlow, "if", "elif", "else", "for", "while", "break", "continue", "return",
+					   "try", "except", "finally", "raise", "with", "yield", "pass", "assert", "del")
+_keywords.add_keywords(KeywordType.ControlFlow, "await", version=307)
+_keywords.add_keywords(KeywordType.ControlFlow, "match", "case", version=310, soft=True)
+_keywords.add_keywords(KeywordType.Qualifier, "def", "class", "lambda", "global", "nonlocal", "import", "from", "as")
+_keywords.add_keywords(KeywordType.Qualifier, "async", version=307)
+_keywords.add_keywords(KeywordType.Qualifier, "type", version=312, soft=True)
+_keywords.add_keywords(KeywordType.Operator, "and", "or", "not", "in", "is")
+_keywords.add_keywords(KeywordType.Constant, "True", "False", "None")
+
+_prefix = r"(?:[rRbBuUfF]|[rR][bBfF]|[bBfF][rR])?"
+_digits = r"\d(?:_?\d)*"
+
+_operators = (
+	"**=", "//=", ">>=", "<<=", "...", "->", ":=", "==", "!=", "<=", ">=", "+=", "-=", "*=", "/=", "%=", "&=", "|=",
+	"^=", "@=", "**", "//", "<<", ">>", "+", "-", "*", "/", "%", "@", "&", "|", "^", "~", "<", ">", "=", "!",
+)
+
+
+def _create_context():
+	context = LexerContext()
+
+	context.add_pattern(TokenType.Newline, r"\r\n|\r|\n")
+	context.add_pattern(TokenType.Whitespace, r"[ \t\f]+|\\(?:\r\n|\r|\n)")
+	context.add_pattern(TokenType.Comment, r"#[^\r\n]*")
+
+	# Triple-quoted strings run to the end of the text and single-quoted ones to the end of the line
+	# when unterminated, so an unfinished string doesn't change how everything before it lexes.
+	# The escaped character is optional, a string can end in a lone backslash at the end of the text.
+	context.add_patterns(
+		TokenType.String,
+		_prefix + r"'''(?:[^'\\]|\\[\s\S]?|'(?!''))*(?:'''|\Z)",
+		_prefix + r'"""(?:[^"\\]|\\[\s\S]?|"(?!""))*(?:"""|\Z)',
+		_prefix + r"'(?:[^'\\\r\n]|\\[\s\S]?)*'?",
+		_prefix + r'"(?:[^"\\\r\n]|\\[\s\S]?)*"?',
+	)
+
+	context.add_patterns(
+		TokenType.Number,
+		r"0[xX](?:_?[0-9a-fA-F])+|0[oO](?:_?[0-7])+|0[bB](?:_?[01])+",
+		r"(?:{0}(?:\.(?:{0})?)?|\.{0})(?:[eE][+-]?{0})?[jJ]?".format(_digits),
+	)
+
+	context.add_pattern(TokenType.Identifier, r"[^\W\d]\w*")
+	context.add_pattern(TokenType.Operator, "|".join(map(re.escape, _operators)))
+	context.add_pattern(TokenType.Separator, r"[()\[\]{},:;.]")
+
+	return context
 
 
 class Python(Language, name="Python", extensions=[".py"]):
 	@staticmethod
 	def lexer():
-		pass
+		# A fresh context each time, the compiled regex is shared between them
+		return _create_context()
 
 	@staticmethod
 	def parser():
 		pass
+
+	@staticmethod
+	def keywords():
+		return _keywords
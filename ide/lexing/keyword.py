@@ -1,6 +1,8 @@
+from array import array
 from enum import IntEnum
+from types import MappingProxyType
 
-from .token import Token
+from .token import TokenType, Token, TokenTable
 
 
 class KeywordType(IntEnum):
@@ -23,12 +25,17 @@ class KeywordType(IntEnum):
 
 
 class Keyword:
-	def __init__(self, name, version = 0, deprecated = False):
+	def __init__(self, name, version = 0, deprecated = False, keyword_type: KeywordType = KeywordType.Unknown,
+				 soft = False):
 
-		self._name = ""
-		self._version = 0
+		self._name = name
+		self._version = version
 
-		self._deprecated = False
+		self._deprecated = deprecated
+		self._type = keyword_type
+
+		# Soft keywords are only keywords in some positions (Python's match, say) and ordinary names elsewhere
+		self._soft = soft
 
 	@property
 	def name(self):
@@ -42,6 +49,14 @@ class Keyword:
 	def deprecated(self) -> bool:
 		return self._deprecated
 
+	@property
+	def type(self) -> KeywordType:
+		return self._type
+
+	@property
+	def soft(self) -> bool:
+		return self._soft
+
 
 class KeywordTable:
 	def __init__(self, keywords: dict = None):
@@ -49,6 +64,7 @@ class KeywordTable:
 			keywords = {}
 
 		self._keywords = keywords
+		self._lookups = {}
 
 	@property
 	def keywords(self):
@@ -57,6 +73,47 @@ class KeywordTable:
 	def copy(self):
 		return KeywordTable(self.keywords.copy())
 
-	def classify(self, token: Token):
-		pass
+	def add(self, keyword: Keyword):
+		self._keywords[keyword.name] = keyword
+		self._lookups.clear()
+
+	def add_keywords(self, keyword_type: KeywordType, *names, version = 0, deprecated = False, soft = False):
+		for name in names:
+			self.add(Keyword(name, version, deprecated, keyword_type, soft))
+
+	def lookup(self, version = None, soft = False):
+		# Frozen name -> KeywordType mapping of the keywords available in version (all of them if None), built once.
+		# Soft keywords are left out unless asked for, a name on its own can't tell whether it is one.
+		lookup = self._lookups.get((version, soft))
+		if lookup is None:
+			lookup = MappingProxyType({
+				name: keyword.type for name, keyword in self._keywords.items()
+				if (version is None or keyword.version <= version) and (soft or not keyword.soft)
+			})
+			self._lookups[version, soft] = lookup
+
+		return lookup
+
+	def classify(self, token: Token, version = None, soft = False):
+		if token.type != TokenType.Identifier:
+			return KeywordType.Unknown
+
+		return self.lookup(version, soft).get(token.value, KeywordType.Unknown)
+
+	def classify_table(self, table: TokenTable, version = None, soft = False):
+		# KeywordType of every token in the table (Unknown for non-keywords), as a parallel array
+		get = self.lookup(version, soft).get
+
+		text = table.text
+		offset = table.offset
+		starts = table.starts
+		ends = table.ends
+
+		result = array("B", bytes(len(table)))
+		identifier = TokenType.Identifier
+		for i, token_type in enumerate(table.types):
+			if token_type == identifier:
+				result[i] = get(text[starts[i] - offset:ends[i] - offset], 0)
+
+		return result
 
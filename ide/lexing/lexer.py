@@ -1,6 +1,11 @@
 import re
 
-from .token import TokenType, Token
+try:
+	from re import _parser as sre_parse
+except ImportError:
+	import sre_parse
+
+from .token import TokenType, Token, TokenTable
 
 
 class Matcher:
@@ -14,6 +19,9 @@ class Matcher:
 	def match(self, text: str, start_pos: int = 0):
 		raise NotImplementedError
 
+	def can_start_with(self, char: str):
+		return True
+
 
 class ExactMatcher(Matcher):
 	def __init__(self, token_type: TokenType, text: str):
@@ -25,17 +33,108 @@ class ExactMatcher(Matcher):
 		return self._text
 
 	def match(self, text: str, start_pos: int = 0):
-		substr = text[start_pos:start_pos+len(self.text)]
-		if substr == self.text:
-			return substr, start_pos + len(self.text)
+		if self.text and text.startswith(self.text, start_pos):
+			return self.text, start_pos + len(self.text)
 		else:
 			return "", start_pos
 
+	def can_start_with(self, char: str):
+		return self.text[:1] == char
+
+
+_categories = {
+	sre_parse.CATEGORY_DIGIT: r"\d",
+	sre_parse.CATEGORY_NOT_DIGIT: r"\D",
+	sre_parse.CATEGORY_SPACE: r"\s",
+	sre_parse.CATEGORY_NOT_SPACE: r"\S",
+	sre_parse.CATEGORY_WORD: r"\w",
+	sre_parse.CATEGORY_NOT_WORD: r"\W",
+}
+
+
+def _first_items(pattern):
+	# Returns the character class items one of which must match the first character consumed by the pattern
+	# (None if that can't be worked out) and whether the pattern can match without consuming anything
+	items = []
+	for op, av in pattern:
+		if op is sre_parse.LITERAL:
+			items.append([(op, av)])
+			return items, False
+		elif op is sre_parse.IN:
+			items.append(av)
+			return items, False
+		elif op is sre_parse.AT or op is sre_parse.ASSERT or op is sre_parse.ASSERT_NOT:
+			continue
+		elif op is sre_parse.BRANCH:
+			nullable = False
+			for branch in av[1]:
+				branch_items, branch_nullable = _first_items(branch)
+				if branch_items is None:
+					return None, True
+				items.extend(branch_items)
+				nullable = nullable or branch_nullable
+		elif op is sre_parse.SUBPATTERN:
+			if av[1] & re.IGNORECASE:
+				return None, True
+			sub_items, nullable = _first_items(av[-1])
+			if sub_items is None:
+				return None, True
+			items.extend(sub_items)
+		elif op is sre_parse.MAX_REPEAT or op is sre_parse.MIN_REPEAT or op is getattr(sre_parse, "POSSESSIVE_REPEAT", None):
+			sub_items, nullable = _first_items(av[2])
+			if sub_items is None:
+				return None, True
+			items.extend(sub_items)
+			nullable = nullable or av[0] == 0
+		elif op is getattr(sre_parse, "ATOMIC_GROUP", None):
+			sub_items, nullable = _first_items(av)
+			if sub_items is None:
+				return None, True
+			items.extend(sub_items)
+		else:
+			return None, True
+
+		if not nullable:
+			return items, False
+
+	return items, True
+
+
+def _first_char_regex(regex):
+	# Builds a regex matching any character a non-empty match of regex can start with, None if it may be anything
+	if regex.flags & re.IGNORECASE or not isinstance(regex.pattern, str):
+		return None
+
+	items, _ = _first_items(sre_parse.parse(regex.pattern, regex.flags))
+	if items is None:
+		return None
+
+	classes = []
+	for item in items:
+		parts = []
+		for op, av in item:
+			if op is sre_parse.LITERAL:
+				parts.append(re.escape(chr(av)))
+			elif op is sre_parse.RANGE:
+				parts.append(re.escape(chr(av[0])) + "-" + re.escape(chr(av[1])))
+			elif op is sre_parse.CATEGORY and av in _categories:
+				parts.append(_categories[av])
+			elif op is sre_parse.NEGATE and not parts:
+				parts.append("^")
+			else:
+				return None
+
+		if parts and parts != ["^"]:
+			classes.append("[" + "".join(parts) + "]")
+
+	return re.compile("|".join(classes) or "(?!)", regex.flags & (re.ASCII | re.UNICODE))
+
 
 class PatternMatcher(Matcher):
 	def __init__(self, token_type: TokenType, regex: str, flags: re.RegexFlag = re.MULTILINE):
 		super().__init__(token_type=token_type)
 		self._regex = re.compile(regex, flags)
+		self._first = _first_char_regex(self._regex)
 
 	@property
 	def regex(self):
@@ -47,6 +146,9 @@ class PatternMatcher(Matcher):
 		end = match.end() if match else start_pos
 		return group, end
 
+	def can_start_with(self, char: str):
+		return self._first is None or self._first.match(char) is not None
+
 
 class DynamicMatcher(Matcher):
 	def __init__(self, token_type: TokenType, func: callable):
@@ -65,26 +167,91 @@ class LexerContext:
 	def __init__(self):
 		self._matchers = []
 
+		self._finalized = False
+		self._trie = {}
+		self._longest_symbol = 0
+		self._dispatch = {}
+
 	@property
 	def matchers(self):
 		return self._matchers
 
+	def add_matcher(self, matcher: Matcher):
+		self.matchers.append(matcher)
+		self._finalized = False
+
 	def add_symbol(self, token_type: TokenType, text: str):
-		self.matchers.append(ExactMatcher(token_type, text))
+		self.add_matcher(ExactMatcher(token_type, text))
 
 	def add_pattern(self, token_type: TokenType, pattern: str, flags: re.RegexFlag = re.MULTILINE):
-		self.matchers.append(PatternMatcher(token_type, pattern, flags))
+		self.add_matcher(PatternMatcher(token_type, pattern, flags))
 
 	def add_dynamic(self, token_type: TokenType, func: callable):
-		self.matchers.append(DynamicMatcher(token_type, func))
+		self.add_matcher(DynamicMatcher(token_type, func))
 
 	def add_symbols(self, token_type: TokenType, *texts):
 		for text in texts:
-			self.matchers.append(ExactMatcher(token_type, text))
+			self.add_matcher(ExactMatcher(token_type, text))
 
 	def add_patterns(self, token_type: TokenType, *patterns, flags: re.RegexFlag = 0):
 		for pattern in patterns:
-			self.matchers.append(PatternMatcher(token_type, pattern, flags))
+			self.add_matcher(PatternMatcher(token_type, pattern, flags))
+
+	def finalize(self):
+		# Trie of symbol texts, each end node holds the first matcher (in order) for that text under the None key
+		self._trie = {}
+		self._longest_symbol = 0
+		for matcher in self.matchers:
+			if isinstance(matcher, ExactMatcher) and matcher.text:
+				node = self._trie
+				for char in matcher.text:
+					node = node.setdefault(char, {})
+				node.setdefault(None, matcher)
+
+				self._longest_symbol = max(self._longest_symbol, len(matcher.text))
+
+		# Candidate matchers per first character, filled in lazily as characters are seen
+		self._dispatch = {}
+		self._finalized = True
+
+	def candidates(self, char: str):
+		if not self._finalized:
+			self.finalize()
+
+		candidates = self._dispatch.get(char)
+		if candidates is None:
+			candidates = tuple(matcher for matcher in self.matchers if matcher.can_start_with(char))
+			self._dispatch[char] = candidates
+
+		return candidates
+
+	def match(self, text: str, start_pos: int = 0):
+		# Returns the first matcher (in order) that matches at start_pos, the matched text and where it ends
+		candidates = self.candidates(text[start_pos])
+
+		# Symbols matching here, found with one walk down the trie
+		symbols = {}
+		node = self._trie
+		for char in text[start_pos:start_pos + self._longest_symbol]:
+			node = node.get(char)
+			if node is None:
+				break
+
+			matcher = node.get(None)
+			if matcher is not None:
+				symbols[matcher] = start_pos + len(matcher.text)
+
+		for matcher in candidates:
+			if isinstance(matcher, ExactMatcher):
+				end_pos = symbols.get(matcher)
+				if end_pos is not None:
+					return matcher, matcher.text, end_pos
+			else:
+				value, end_pos = matcher.match(text, start_pos)
+				if end_pos > start_pos:
+					return matcher, value, end_pos
+
+		return None, "", start_pos
 
 
 class Lexer:
@@ -116,12 +283,11 @@ class Lexer:
 		if self.is_eof():
 			return None
 
-		for matcher in self.context.matchers:
-			text, end_pos = matcher.match(self.text, self.position)
-			if end_pos > self.position:
-				token = Token(text, matcher.token_type, self.position, end_pos)
-				self._position = end_pos
-				return token
+		matcher, text, end_pos = self.context.match(self.text, self.position)
+		if matcher is not None:
+			token = Token(text, matcher.token_type, self.position, end_pos)
+			self._position = end_pos
+			return token
 
 		start_pos = self._position
 		self._position += 1
@@ -134,3 +300,25 @@ class Lexer:
 		while token:
 			yield token
 			token = self.next_token()
+
+	def table(self):
+		# Lexes the remaining text into a TokenTable without creating a Token per token
+		table = TokenTable(self.text)
+		append = table.append
+
+		text = self.text
+		length = self.length
+		match = self.context.match
+		position = self.position
+
+		while position < length:
+			matcher, _, end_pos = match(text, position)
+			if matcher is not None:
+				append(matcher.token_type, position, end_pos)
+				position = end_pos
+			else:
+				append(TokenType.Unknown, position, position + 1)
+				position += 1
+
+		self._position = position
+		return table
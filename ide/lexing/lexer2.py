@@ -1,6 +1,10 @@
 import re
 
-from .token import TokenType, Token
+from .token import TokenType, Token, TokenTable, TokenList
+
+
+# Compiled contexts shared by the whole process, keyed by rules and flags
+_compiled = {}
 
 
 class LexerContext:
@@ -8,6 +12,7 @@ class LexerContext:
 		self._rules = []
 		self._flags = re.MULTILINE
 		self._regex = None
+		self._types = None
 
 	@property
 	def rules(self):
@@ -19,6 +24,8 @@ class LexerContext:
 
 	def add_flag(self, flag: re.RegexFlag):
 		self._flags |= flag
+		self._regex = None
+		self._types = None
 
 	@property
 	def regex(self):
@@ -27,16 +34,39 @@ class LexerContext:
 
 		return self._regex
 
+	@property
+	def types(self):
+		# TokenType of each group index, indexed by match.lastindex
+		if self._types is None:
+			self.compile()
+
+		return self._types
+
 	def compile(self):
-		parts = ["(?P<{}{}>{})".format(rule[0].name, i + 1, rule[1]) for i, rule in enumerate(self.rules)]
-		self._regex = re.compile("|".join(parts))
+		key = (tuple(self.rules), self.flags)
+
+		compiled = _compiled.get(key)
+		if compiled is None:
+			names = ["{}{}".format(rule[0].name, i + 1) for i, rule in enumerate(self.rules)]
+			parts = ["(?P<{}>{})".format(name, rule[1]) for name, rule in zip(names, self.rules)]
+			regex = re.compile("|".join(parts), self.flags)
+
+			types = [TokenType.Unknown] * (regex.groups + 1)
+			for name, rule in zip(names, self.rules):
+				types[regex.groupindex[name]] = rule[0]
+
+			compiled = _compiled[key] = (regex, tuple(types))
+
+		self._regex, self._types = compiled
 
 	def add_pattern(self, token_type: TokenType, rule: str):
 		self.rules.append((token_type, rule))
+		self._regex = None
+		self._types = None
 
 	def add_patterns(self, token_type: TokenType, *patterns):
 		for pattern in patterns:
-			self.rules.append((token_type, pattern))
+			self.add_pattern(token_type, pattern)
 
 
 class Lexer:
@@ -70,10 +100,8 @@ class Lexer:
 
 		match = self.context.regex.match(self.text, self.position)
 		if match and match.end() > match.start():
-			last_group = match.lastgroup
-
-			token_type = TokenType[last_group[:-len(str(match.lastindex))]]
-			text = match.group(last_group)
+			token_type = self.context.types[match.lastindex]
+			text = match.group()
 
 			token = Token(text, token_type, match.start(), match.end())
 			token.match = match
@@ -93,3 +121,88 @@ class Lexer:
 			yield token
 			token = self.next_token()
 
+	def table(self):
+		# Lexes the remaining text into a TokenTable without creating a Token or keeping a match per token
+		table = TokenTable(self.text)
+		append = table.append
+
+		text = self.text
+		length = self.length
+		match = self.context.regex.match
+		token_types = self.context.types
+		position = self.position
+
+		while position < length:
+			m = match(text, position)
+			if m:
+				end_pos = m.end()
+				if end_pos > position:
+					append(token_types[m.lastindex], position, end_pos)
+					position = end_pos
+					continue
+
+			append(TokenType.Unknown, position, position + 1)
+			position += 1
+
+		self._position = position
+		return table
+
+	def relex(self, tokens: list, offset: int, removed: int, inserted: str):
+		# Applies an edit to the text and re-lexes only the damaged region of the previous token stream.
+		# Returns (first, last, new_tokens): tokens[first:last] are replaced by new_tokens, and every
+		# token from last onwards is unchanged apart from being shifted by len(inserted) - removed.
+		delta = len(inserted) - removed
+		edit_end = offset + len(inserted)
+
+		self._text = self.text[:offset] + inserted + self.text[offset + removed:]
+
+		# Restart from the start of the line holding the edit: a failed match earlier on the line
+		# (an unterminated string, for example) may succeed now. Rules whose failed attempts span
+		# several lines are not covered.
+		restart = self.text.rfind("\n", 0, offset) + 1
+
+		lo, hi = 0, len(tokens)
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if tokens[mid].end_pos < restart:
+				lo = mid + 1
+			else:
+				hi = mid
+
+		first = lo
+		self._position = min(tokens[first].start_pos, restart) if first < len(tokens) else restart
+
+		last = first
+		new_tokens = []
+		token = self.next_token()
+		while token:
+			if token.start_pos >= edit_end:
+				while last < len(tokens) and tokens[last].start_pos + delta < token.start_pos:
+					last += 1
+
+				if last < len(tokens):
+					old = tokens[last]
+					if old.start_pos + delta == token.start_pos and old.end_pos + delta == token.end_pos and old.type == token.type:
+						# Back in step with the old stream, the rest of it is still valid
+						return first, last, new_tokens
+
+			new_tokens.append(token)
+			token = self.next_token()
+
+		return first, len(tokens), new_tokens
+
+	def update(self, tokens, offset: int, removed: int, inserted: str):
+		# Same as relex, but splices the result into tokens in place. With a TokenList the tokens after
+		# the edit are shifted lazily, with a list every one of them is replaced.
+		first, last, new_tokens = self.relex(tokens, offset, removed, inserted)
+
+		delta = len(inserted) - removed
+		if isinstance(tokens, TokenList):
+			tokens.shift(last, delta)
+		elif delta:
+			for i in range(last, len(tokens)):
+				tokens[i] = tokens[i].shifted(delta)
+
+		tokens[first:last] = new_tokens
+		return first, first + len(new_tokens)
+
@@ -0,0 +1,150 @@
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from .lexer2 import LexerContext, Lexer
+from .token import TokenType, TokenTable
+
+
+# Worker process state, set once per process by _init_worker
+_worker_context = None
+
+
+def _init_worker(rules, flags):
+	global _worker_context
+
+	_worker_context = LexerContext()
+	_worker_context.add_flag(flags)
+	for token_type, rule in rules:
+		_worker_context.add_pattern(token_type, rule)
+
+
+def _lex_range(text: str, offset: int, end: int, final: bool):
+	# Lexes text, the piece of the whole text at offset, from its start until a token reaches end, the last
+	# token may run past it. Unless the piece runs to the end of the whole text, a token reaching the end of
+	# the piece might carry on in the whole text, so it's left for the serial lexer.
+	match = _worker_context.regex.match
+	token_types = _worker_context.types
+	length = len(text)
+
+	starts = array("q")
+	ends = array("q")
+	types = array("B")
+
+	position = 0
+	while position < end:
+		m = match(text, position)
+		if m and m.end() > position:
+			token_type = token_types[m.lastindex]
+			end_pos = m.end()
+		else:
+			token_type = TokenType.Unknown
+			end_pos = position + 1
+
+		if end_pos >= length and not final:
+			break
+
+		starts.append(offset + position)
+		ends.append(offset + end_pos)
+		types.append(token_type)
+		position = end_pos
+
+	return starts, ends, types, offset + position
+
+
+class ParallelLexer:
+	# Splits text at line starts, lexes the pieces in a process pool and stitches them back together.
+	# Each worker is sent its piece and overlap characters after it, for the tokens that run past the split.
+	# A split may land inside a string or comment, so a piece is only used from the first of its tokens
+	# the serial lexer also produces, anything before that is re-lexed here. The result is the same as
+	# Lexer(context, text).table().
+	def __init__(self, context: LexerContext, text: str, chunk_size: int = 1 << 20, max_workers: int = None,
+				 overlap: int = 1 << 16):
+		self._context = context
+		self._text = text
+		self._chunk_size = chunk_size
+		self._max_workers = max_workers
+		self._overlap = overlap
+
+	@property
+	def context(self):
+		return self._context
+
+	@property
+	def text(self):
+		return self._text
+
+	@property
+	def chunk_size(self):
+		return self._chunk_size
+
+	@property
+	def overlap(self):
+		return self._overlap
+
+	def split(self):
+		text = self.text
+		length = len(text)
+
+		bounds = [0]
+		while bounds[-1] + self.chunk_size < length:
+			split = text.find("\n", bounds[-1] + self.chunk_size) + 1
+			if not split or split >= length:
+				break
+			bounds.append(split)
+		bounds.append(length)
+
+		return list(zip(bounds, bounds[1:]))
+
+	def table(self):
+		ranges = self.split()
+		if len(ranges) < 2:
+			return Lexer(self.context, self.text).table()
+
+		text = self.text
+		length = len(text)
+
+		initargs = (list(self.context.rules), self.context.flags)
+		with ProcessPoolExecutor(self._max_workers, initializer=_init_worker, initargs=initargs) as executor:
+			futures = []
+			for start, end in ranges:
+				stop = min(end + self.overlap, length)
+				futures.append(executor.submit(_lex_range, text[start:stop], start, end - start, stop == length))
+
+			return self._stitch(ranges, futures)
+
+	def _stitch(self, ranges, futures):
+		text = self.text
+		match = self.context.regex.match
+		token_types = self.context.types
+
+		table = TokenTable(text)
+		append = table.append
+
+		position = 0
+		for (start, _), future in zip(ranges, futures):
+			starts, ends, types, stop = future.result()
+
+			while position < stop:
+				# Jump onto the piece once the serial stream lines up with one of its tokens
+				if position >= start:
+					i = bisect_left(starts, position)
+					if i < len(starts) and starts[i] == position:
+						table.starts.extend(starts[i:])
+						table.ends.extend(ends[i:])
+						table.types.extend(types[i:])
+						position = stop
+						break
+
+				m = match(text, position)
+				if m and m.end() > position:
+					append(token_types[m.lastindex], position, m.end())
+					position = m.end()
+				else:
+					append(TokenType.Unknown, position, position + 1)
+					position += 1
+
+		return table
+
+	def tokens(self):
+		yield from self.table()
@@ -0,0 +1,122 @@
+import codecs
+
+from .lexer2 import LexerContext
+from .token import TokenType, TokenTable
+
+
+class StreamLexer:
+	# Lexes a binary file, an mmap, a bytes-like object or an iterator of chunks (bytes or str)
+	# without holding the whole text, tokens carry absolute character offsets.
+	def __init__(self, context: LexerContext, source, encoding: str = "utf-8", errors: str = "strict",
+				 chunk_size: int = 1 << 20, max_carry: int = 1 << 24):
+		self._context = context
+		self._source = source
+		self._encoding = encoding
+		self._errors = errors
+		self._chunk_size = chunk_size
+		self._max_carry = max_carry
+
+	@property
+	def context(self):
+		return self._context
+
+	@property
+	def encoding(self):
+		return self._encoding
+
+	@property
+	def chunk_size(self):
+		return self._chunk_size
+
+	@property
+	def max_carry(self):
+		# Most text held back between chunks, a token longer than this is cut
+		return self._max_carry
+
+	def chunks(self):
+		source = self._source
+		chunk_size = self.chunk_size
+
+		if hasattr(source, "read"):
+			chunk = source.read(chunk_size)
+			while chunk:
+				yield chunk
+				chunk = source.read(chunk_size)
+		elif isinstance(source, (bytes, bytearray, memoryview)):
+			view = memoryview(source)
+			for i in range(0, len(view), chunk_size):
+				yield view[i:i + chunk_size]
+		else:
+			yield from source
+
+	def tables(self):
+		match = self.context.regex.match
+		token_types = self.context.types
+		decoder = codecs.getincrementaldecoder(self.encoding)(self._errors)
+
+		buffer = ""
+		offset = 0
+
+		# Buffer length to reach before lexing again, doubling while a token spans chunks
+		# so a long one is re-matched a logarithmic number of times rather than once per chunk
+		retry = 0
+
+		chunks = self.chunks()
+		final = False
+		while not final:
+			chunk = next(chunks, None)
+			if chunk is None:
+				final = True
+				buffer += decoder.decode(b"", final=True)
+			elif isinstance(chunk, str):
+				buffer += chunk
+			else:
+				buffer += decoder.decode(chunk)
+
+			length = len(buffer)
+			if length < retry and not final:
+				continue
+
+			# Only lex whole lines until the end, the same resynchronisation rule Lexer.relex relies on.
+			# Tokens running past the last newline or reaching the end of the buffer might lex differently
+			# with the next chunk, so they wait too. Only if what's held back would be max_carry or more
+			# does everything go, cutting the token that doesn't fit, to keep memory bounded.
+			forced = final
+			limit = length if forced else buffer.rfind("\n") + 1
+
+			table = TokenTable(buffer, offset=offset)
+			append = table.append
+
+			position = 0
+			while True:
+				while position < limit:
+					m = match(buffer, position)
+					if m and m.end() > position:
+						token_type = token_types[m.lastindex]
+						end_pos = m.end()
+					else:
+						token_type = TokenType.Unknown
+						end_pos = position + 1
+
+					if (end_pos > limit or end_pos >= length) and not forced:
+						break
+
+					append(token_type, offset + position, offset + end_pos)
+					position = end_pos
+
+				if forced or length - position < self.max_carry:
+					break
+
+				forced = True
+				limit = length
+
+			if len(table):
+				yield table
+
+			buffer = buffer[position:]
+			offset += position
+			retry = min(2 * len(buffer), self.max_carry)
+
+	def tokens(self):
+		for table in self.tables():
+			yield from table
@@ -1,6 +1,8 @@
+from array import array
+from bisect import bisect_right
 from enum import IntEnum
 
-from ide.string import escape_ex
+from ide.string import escape_ex, LineIndex
 
 
 class TokenType(IntEnum):
@@ -22,6 +24,8 @@ class TokenType(IntEnum):
 
 
 class Token:
+	__slots__ = ("_value", "_type", "_start_pos", "_end_pos", "match")
+
 	def __init__(self,	value: str, token_type: TokenType = TokenType.Unknown,
 						start_pos: int = 0, end_pos: int = 0):
 		self._value = value
@@ -32,6 +36,9 @@ class Token:
 	def copy(self):
 		return Token(self.value, self.type, self._start_pos, self.end_pos)
 
+	def shifted(self, delta: int):
+		return Token(self.value, self.type, self.start_pos + delta, self.end_pos + delta)
+
 	@property
 	def value(self) -> str:
 		return self._value
@@ -54,3 +61,182 @@ class Token:
 
 	def __repr__(self):
 		return f"{self.start_pos:0=4d}-{self.end_pos:0=4d} {self.type.name.lower()}: \"{self.escaped_value}\""
+
+
+class TokenTable:
+	# Columnar token stream: parallel arrays of start, end and type, values are sliced from the text on demand.
+	# The arrays support the buffer protocol, so numpy.frombuffer can view them without copying.
+	# offset is the absolute position of text[0], for tables covering a window of a larger stream.
+	def __init__(self, text: str, starts: array = None, ends: array = None, types: array = None, offset: int = 0):
+		self._text = text
+		self._offset = offset
+		self._starts = starts if starts is not None else array("q")
+		self._ends = ends if ends is not None else array("q")
+		self._types = types if types is not None else array("B")
+
+	@property
+	def text(self) -> str:
+		return self._text
+
+	@property
+	def offset(self) -> int:
+		return self._offset
+
+	@property
+	def starts(self) -> array:
+		return self._starts
+
+	@property
+	def ends(self) -> array:
+		return self._ends
+
+	@property
+	def types(self) -> array:
+		return self._types
+
+	def append(self, token_type: int, start_pos: int, end_pos: int):
+		self._starts.append(start_pos)
+		self._ends.append(end_pos)
+		self._types.append(token_type)
+
+	def extend(self, other):
+		self._starts.extend(other.starts)
+		self._ends.extend(other.ends)
+		self._types.extend(other.types)
+
+	def value(self, index: int) -> str:
+		return self._text[self._starts[index] - self._offset:self._ends[index] - self._offset]
+
+	def type(self, index: int) -> TokenType:
+		return TokenType(self._types[index])
+
+	def token(self, index: int) -> Token:
+		start_pos = self._starts[index]
+		end_pos = self._ends[index]
+		value = self._text[start_pos - self._offset:end_pos - self._offset]
+		return Token(value, TokenType(self._types[index]), start_pos, end_pos)
+
+	def lines(self, index: LineIndex) -> array:
+		# Line of every token start, index being over the text the positions refer to. Starts only go
+		# forward, so this is one walk over the tokens and lines rather than a bisect per token.
+		line_starts = index.line_starts()
+		line_count = len(line_starts)
+
+		lines = array("q")
+		line = 0
+		for start_pos in self._starts:
+			while line + 1 < line_count and line_starts[line + 1] <= start_pos:
+				line += 1
+			lines.append(line)
+
+		return lines
+
+	def position(self, index: int, lines: LineIndex):
+		# (line, column) of a token's start
+		return lines.position(self._starts[index])
+
+	def __len__(self):
+		return len(self._types)
+
+	def __getitem__(self, index: int) -> Token:
+		return self.token(index)
+
+	def __iter__(self):
+		for i in range(len(self)):
+			yield self.token(i)
+
+
+class TokenList:
+	# List of Tokens for Lexer.update, kept in blocks of about block_size tokens, each with a delta not yet
+	# applied to its tokens. Shifting everything after an edit only moves the deltas of the blocks after it,
+	# the same way LineIndex moves its block bases, and tokens are shifted as they're read.
+	block_size = 1 << 10
+
+	def __init__(self, tokens = ()):
+		self._blocks = []
+		self._deltas = []
+
+		# Index of the first token in each block
+		self._firsts = []
+
+		self._store(0, 0, list(tokens))
+
+	def _store(self, block: int, end: int, tokens: list):
+		# Replaces blocks [block, end) with settled tokens, renumbering every block from there on
+		size = self.block_size
+		blocks = [tokens[i:i + size] for i in range(0, len(tokens), size)]
+		if not blocks and len(self._blocks) - (end - block) == 0:
+			blocks = [[]]
+
+		self._blocks[block:end] = blocks
+		self._deltas[block:end] = [0] * len(blocks)
+
+		first = self._firsts[block - 1] + len(self._blocks[block - 1]) if block else 0
+		firsts = self._firsts[:block]
+		for tokens in self._blocks[block:]:
+			firsts.append(first)
+			first += len(tokens)
+		self._firsts = firsts
+
+	def _settled(self, block: int):
+		delta = self._deltas[block]
+		if delta:
+			return [token.shifted(delta) for token in self._blocks[block]]
+		return list(self._blocks[block])
+
+	def _find(self, index: int):
+		block = bisect_right(self._firsts, index) - 1
+		return block, index - self._firsts[block]
+
+	def __len__(self):
+		return self._firsts[-1] + len(self._blocks[-1])
+
+	def __getitem__(self, index: int) -> Token:
+		if index < 0:
+			index += len(self)
+		if not 0 <= index < len(self):
+			raise IndexError("token index out of range")
+
+		block, i = self._find(index)
+		delta = self._deltas[block]
+		token = self._blocks[block][i]
+		return token.shifted(delta) if delta else token
+
+	def __setitem__(self, index: slice, tokens):
+		# Only contiguous slices, which is all Lexer.update needs
+		start, stop, step = index.indices(len(self))
+		if step != 1:
+			raise ValueError("TokenList only supports contiguous slices")
+		stop = max(start, stop)
+
+		first, i = self._find(start)
+		last, j = self._find(stop)
+
+		settled = []
+		for block in range(first, last + 1):
+			settled.extend(self._settled(block))
+
+		j += self._firsts[last] - self._firsts[first]
+		settled[i:j] = tokens
+		self._store(first, last + 1, settled)
+
+	def __iter__(self):
+		for block, delta in zip(self._blocks, self._deltas):
+			if delta:
+				for token in block:
+					yield token.shifted(delta)
+			else:
+				yield from block
+
+	def shift(self, index: int, delta: int):
+		# Moves every token from index onwards by delta
+		if not delta or index >= len(self):
+			return
+
+		block, i = self._find(index)
+		tokens = self._blocks[block]
+		if i:
+			tokens[i:] = [token.shifted(delta) for token in tokens[i:]]
+			block += 1
+
+		self._deltas[block:] = [d + delta for d in self._deltas[block:]]
@@ -1 +1,3 @@
 from .escaping import escape_newlines, escape, escape_np, escape_ex
+from .piecetable import PieceTable
+from .lineindex import LineIndex
@@ -0,0 +1,117 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, chain
+
+
+class LineIndex:
+	# Offsets of line starts, for turning offsets into (line, column) and back with a bisect.
+	# Lines and columns count from 0 and only "\n" ends a line.
+	#
+	# The starts are kept in blocks of about block_size lines, each relative to the offset its block begins
+	# at, so an edit only rewrites the block it lands in and moves the bases of the blocks after it.
+	block_size = 1 << 10
+
+	def __init__(self, text: str = ""):
+		self._bases = []
+		self._blocks = []
+
+		# Number of the first line in each block
+		self._firsts = []
+
+		self._store(0, 0, self._scan(text, 0, True))
+
+	@staticmethod
+	def _scan(text: str, offset: int, first: bool = False):
+		# Starts of the lines following each newline in text, text being at offset, and offset itself if first
+		lengths = [len(line) + 1 for line in text.split("\n")]
+		lengths.pop()
+		starts = array("q", accumulate(chain((offset,), lengths)))
+		return starts if first else starts[1:]
+
+	def _store(self, block: int, end: int, starts: array):
+		# Replaces blocks [block, end) with absolute line starts, renumbering every block from there on
+		size = self.block_size
+		bases = []
+		blocks = []
+		for i in range(0, len(starts), size):
+			base = starts[i]
+			bases.append(base)
+			blocks.append(array("q", [start - base for start in starts[i:i + size]]))
+
+		self._bases[block:end] = bases
+		self._blocks[block:end] = blocks
+
+		first = self._firsts[block - 1] + len(self._blocks[block - 1]) if block else 0
+		self._firsts[block:] = accumulate(chain((first,), map(len, self._blocks[block:])))
+		self._firsts.pop()
+
+	def _absolute(self, block: int):
+		base = self._bases[block]
+		return array("q", [start + base for start in self._blocks[block]])
+
+	def _find_offset(self, offset: int):
+		block = max(bisect_right(self._bases, offset) - 1, 0)
+		return block, bisect_right(self._blocks[block], offset - self._bases[block]) - 1
+
+	def _find_line(self, line: int):
+		block = bisect_right(self._firsts, line) - 1
+		return block, line - self._firsts[block]
+
+	def __len__(self):
+		return self._firsts[-1] + len(self._blocks[-1])
+
+	def line_start(self, line: int):
+		if not 0 <= line < len(self):
+			raise IndexError(f"line {line} out of range")
+
+		block, i = self._find_line(line)
+		return self._bases[block] + self._blocks[block][i]
+
+	def line_starts(self):
+		starts = array("q")
+		for block in range(len(self._blocks)):
+			starts.extend(self._absolute(block))
+		return starts
+
+	def line(self, offset: int):
+		# Line holding offset, an offset on a newline belongs to the line it ends
+		block, i = self._find_offset(offset)
+		return self._firsts[block] + i
+
+	def position(self, offset: int):
+		line = self.line(offset)
+		return line, offset - self.line_start(line)
+
+	def offset(self, line: int, column: int = 0):
+		return self.line_start(line) + column
+
+	def update(self, position: int, removed: int, inserted: str):
+		# Removes removed characters at position and inserts the text there
+		delta = len(inserted) - removed
+		first, i = self._find_offset(position)
+		last, j = self._find_offset(position + removed) if removed else (first, i)
+
+		if first == last and "\n" not in inserted:
+			# The common case, typing within a line: no line starts come or go
+			if j > i:
+				del self._blocks[first][i + 1:j + 1]
+				self._firsts[first + 1:] = [n - (j - i) for n in self._firsts[first + 1:]]
+
+			block = self._blocks[first]
+			if delta:
+				block[i + 1:] = array("q", [start + delta for start in block[i + 1:]])
+		else:
+			starts = array("q")
+			for block in range(first, last + 1):
+				starts.extend(self._absolute(block))
+
+			j += self._firsts[last] - self._firsts[first]
+			tail = array("q", [start + delta for start in starts[j + 1:]])
+			starts[i + 1:] = self._scan(inserted, position)
+			starts.extend(tail)
+
+			self._store(first, last + 1, starts)
+			last = first + (len(starts) - 1) // self.block_size
+
+		if delta:
+			self._bases[last + 1:] = [base + delta for base in self._bases[last + 1:]]
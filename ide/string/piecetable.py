@@ -0,0 +1,167 @@
+import random
+
+
+class _Piece:
+	# Treap node over pieces of text, keyed implicitly by position. Nodes are never changed once
+	# built, edits copy the path they touch, so any older root is still a valid snapshot.
+	__slots__ = ("text", "start", "length", "left", "right", "size", "priority")
+
+	def __init__(self, text: str, start: int, length: int, left, right, priority: float):
+		self.text = text
+		self.start = start
+		self.length = length
+		self.left = left
+		self.right = right
+		self.size = length + (left.size if left else 0) + (right.size if right else 0)
+		self.priority = priority
+
+	def with_children(self, left, right):
+		return _Piece(self.text, self.start, self.length, left, right, self.priority)
+
+
+def _leaf(text: str, start: int, length: int):
+	return _Piece(text, start, length, None, None, random.random())
+
+
+def _merge(a, b):
+	if a is None:
+		return b
+	if b is None:
+		return a
+
+	if a.priority > b.priority:
+		return a.with_children(a.left, _merge(a.right, b))
+	else:
+		return b.with_children(_merge(a, b.left), b.right)
+
+
+def _split(node, position: int):
+	# Returns the first position characters and the rest, cutting a piece in two when needed
+	if node is None:
+		return None, None
+
+	left_size = node.left.size if node.left else 0
+
+	if position <= left_size:
+		left, right = _split(node.left, position)
+		return left, node.with_children(right, node.right)
+
+	position -= left_size
+	if position >= node.length:
+		left, right = _split(node.right, position - node.length)
+		return node.with_children(node.left, left), right
+
+	head = _Piece(node.text, node.start, position, node.left, None, node.priority)
+	tail = _Piece(node.text, node.start + position, node.length - position, None, node.right, random.random())
+	return head, tail
+
+
+class PieceTable:
+	# Text kept as pieces of the strings it was built from, in a persistent treap. Inserting and deleting
+	# are O(log n) in the number of pieces and never copy the text, and snapshot() is O(1).
+	def __init__(self, text: str = "", _root=None):
+		self._root = _root if _root is not None or not text else _leaf(text, 0, len(text))
+
+	def __len__(self):
+		return self._root.size if self._root else 0
+
+	def __str__(self):
+		return self.text()
+
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			start, stop, step = key.indices(len(self))
+			if step != 1:
+				return self.text()[key]
+			return self.text(start, stop)
+
+		if key < 0:
+			key += len(self)
+		if not 0 <= key < len(self):
+			raise IndexError("piece table index out of range")
+
+		node = self._root
+		while True:
+			left_size = node.left.size if node.left else 0
+			if key < left_size:
+				node = node.left
+			elif key < left_size + node.length:
+				return node.text[node.start + key - left_size]
+			else:
+				key -= left_size + node.length
+				node = node.right
+
+	def snapshot(self):
+		# Shares every node, safe to hand to another thread while this table keeps changing
+		return PieceTable(_root=self._root)
+
+	def insert(self, position: int, text: str):
+		if not 0 <= position <= len(self):
+			raise IndexError(f"insert position {position} out of range")
+
+		if text:
+			left, right = _split(self._root, position)
+			self._root = _merge(_merge(left, _leaf(text, 0, len(text))), right)
+
+	def delete(self, position: int, length: int):
+		if position < 0 or length < 0 or position + length > len(self):
+			raise IndexError(f"delete range {position}:{position + length} out of range")
+
+		if length:
+			left, right = _split(self._root, position)
+			_, right = _split(right, length)
+			self._root = _merge(left, right)
+
+	def replace(self, position: int, length: int, text: str):
+		self.delete(position, length)
+		self.insert(position, text)
+
+	def spans(self, start: int = 0, end: int = None):
+		# Yields (text, start, end) for each piece overlapping the range, without slicing anything
+		if end is None or end > len(self):
+			end = len(self)
+		start = max(start, 0)
+		if start >= end:
+			return
+
+		# In-order walk that skips subtrees outside the range, offset is where a node's subtree begins
+		stack = []
+		node = self._root
+		offset = 0
+		while stack or node is not None:
+			while node is not None:
+				left_size = node.left.size if node.left else 0
+				if start < offset + left_size:
+					stack.append((node, offset))
+					node = node.left
+				else:
+					# Nothing wanted on the left
+					stack.append((node, offset))
+					node = None
+
+			node, offset = stack.pop()
+			left_size = node.left.size if node.left else 0
+			piece_start = offset + left_size
+			piece_end = piece_start + node.length
+
+			if piece_start >= end:
+				return
+
+			if piece_end > start:
+				lo = max(start, piece_start) - piece_start
+				hi = min(end, piece_end) - piece_start
+				yield node.text, node.start + lo, node.start + hi
+
+			offset = piece_end
+			node = node.right
+
+	def chunks(self, start: int = 0, end: int = None):
+		# Pieces covering the range as strings, whole pieces are passed on as they are
+		for text, lo, hi in self.spans(start, end):
+			yield text if lo == 0 and hi == len(text) else text[lo:hi]
+
+	def text(self, start: int = 0, end: int = None):
+		return "".join(self.chunks(start, end))
+
+	def pieces(self):
+		return sum(1 for _ in self.spans())
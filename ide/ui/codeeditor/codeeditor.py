@@ -2,37 +2,61 @@ from PySide2.QtCore import QRect
 from PySide2.QtGui import QFont, QResizeEvent, QTextFormat
 from PySide2.QtWidgets import QTextEdit, QPlainTextEdit
 
+from .highlighter import SyntaxHighlighter
 from .linenumberarea import LineNumberArea
 from ..colours import OuterSpace
-from ..documents import CodeDocument
+from ..documents import CodeDocument, TextDocument
 
 
 class CodeEditor(QPlainTextEdit):
 	def __init__(self, parent=None):
 		super().__init__(parent)
 
+		# Shown from the start, so text typed into a new tab is in the document and survives unloading
 		self._document = CodeDocument()
+		super().setDocument(self._document.document())
+		self._highlighter = None
 
 		self.setFont(QFont("Source Code Pro", 12))
 		self.setLineWrapMode(QPlainTextEdit.NoWrap)
 		self.setIndentationWidth(4)
 
 		self.lineNumberArea = LineNumberArea(self)
+		self._lineNumberWidth = -1
 
-		self.blockCountChanged.connect(lambda: self.setViewportMargins(self.lineNumberArea.numberWidth(), 0, 0, 0))
+		self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
 		self.updateRequest.connect(self.updateLineNumberArea)
 		self.cursorPositionChanged.connect(self.highlightCurrentLine)
 
 		self.highlightCurrentLine()
-		self.setViewportMargins(self.lineNumberArea.numberWidth(), 0, 0, 0)
+		self.updateLineNumberAreaWidth()
 
 	def document(self):
 		return self._document
 
-	def setDocument(self, document: CodeDocument):
+	def setDocument(self, document: TextDocument):
 		self._document = document
 		super().setDocument(document.document())
-		super().setPlainText(document.document().toPlainText())
+
+		self.detachHighlighter()
+
+		# Highlighting is left off in large-file mode
+		language = document.language() if not document.isLarge() else None
+		context = language.lexer() if language else None
+		if context is not None:
+			self._highlighter = SyntaxHighlighter(document.document(), context, language.keywords(), self)
+
+	def detachHighlighter(self):
+		if self._highlighter is not None:
+			self._highlighter.setDocument(None)
+			self._highlighter.deleteLater()
+			self._highlighter = None
+
+	def detachDocument(self):
+		# The highlighter belongs to the QTextDocument, which outlives this editor when a tab is unloaded
+		self.detachHighlighter()
+		self._document = CodeDocument()
+		super().setDocument(self._document.document())
 
 	def setIndentationWidth(self, n_spaces: int):
 		self.setTabStopDistance(self.fontMetrics().horizontalAdvance(" ") * n_spaces)
@@ -59,12 +83,23 @@ class CodeEditor(QPlainTextEdit):
 		cr = self.contentsRect()
 		self.lineNumberArea.setGeometry(cr.left(), cr.top(), self.lineNumberArea.numberWidth(), cr.height())
 
+	def updateLineNumberAreaWidth(self):
+		# Margins are only touched when the digit count changes, resetting them relayouts the viewport
+		width = self.lineNumberArea.numberWidth()
+		if width != self._lineNumberWidth:
+			self._lineNumberWidth = width
+			self.setViewportMargins(width, 0, 0, 0)
+
+			cr = self.contentsRect()
+			self.lineNumberArea.setGeometry(cr.left(), cr.top(), width, cr.height())
+
 	def updateLineNumberArea(self, rect: QRect, dy: int = 0):
 		# todo: move this into LineNumberArea
 		if dy:
+			# Moves the rows already painted and only repaints the ones scrolled in
 			self.lineNumberArea.scroll(0, dy)
 		else:
 			self.lineNumberArea.update(0, rect.y(), self.lineNumberArea.width(), rect.height())
 
 		if rect.contains(self.viewport().rect()):
-			self.setViewportMargins(self.lineNumberArea.numberWidth(), 0, 0, 0)
+			self.updateLineNumberAreaWidth()
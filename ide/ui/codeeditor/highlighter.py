@@ -0,0 +1,209 @@
+import time
+
+from PySide2.QtCore import QEvent, QTimer
+from PySide2.QtGui import QSyntaxHighlighter, QTextCharFormat, QTextDocument
+
+from ide.lexing import lexer, lexer2
+from ide.lexing.keyword import KeywordType, KeywordTable
+from ide.lexing.token import TokenType
+
+from ..colours import CornflowerBlue, DarkGray, DarkSeaGreen, Goldenrod, LightSalmon, LightSkyBlue, Orchid, Plum
+
+
+def _format(colour, bold: bool = False, italic: bool = False):
+	text_format = QTextCharFormat()
+	text_format.setForeground(colour)
+	if bold:
+		text_format.setFontWeight(75)
+	text_format.setFontItalic(italic)
+	return text_format
+
+
+class SyntaxHighlighter(QSyntaxHighlighter):
+	# Block states: Unlexed blocks were never seen, Pending blocks were put off, Clean blocks end outside
+	# any token, and higher states name the text of a token (a triple-quoted string, say) still open at the
+	# block end, verbatim so a line continuation at its end still applies.
+	Unlexed = -1
+	Pending = -2
+	Clean = 0
+
+	# Blocks this many screens above or below the viewport are left to idle time
+	viewportMargin = 1
+
+	# Time spent per idle slice highlighting far away blocks
+	idleBudget = 0.008
+
+	tokenFormats = {
+		TokenType.String: _format(DarkSeaGreen),
+		TokenType.Number: _format(LightSkyBlue),
+		TokenType.Operator: _format(Plum),
+		TokenType.Comment: _format(DarkGray, italic=True),
+		TokenType.Preprocessor: _format(Orchid),
+	}
+
+	keywordFormats = {
+		KeywordType.ControlFlow: _format(CornflowerBlue, bold=True),
+		KeywordType.Qualifier: _format(CornflowerBlue),
+		KeywordType.DataType: _format(LightSalmon),
+		KeywordType.Operator: _format(CornflowerBlue, bold=True),
+		KeywordType.Constant: _format(Goldenrod),
+	}
+
+	def __init__(self, document: QTextDocument, context, keywords: KeywordTable = None, editor=None):
+		super().__init__(document)
+
+		self._context = context
+		self._lexer = lexer.Lexer if isinstance(context, lexer.LexerContext) else lexer2.Lexer
+		self._keywords = keywords.lookup() if keywords else {}
+		self._editor = editor
+
+		# Open token texts by state and the other way round
+		self._openers = {}
+		self._states = {}
+
+		self._forcedBlock = -1
+		self._firstPending = None
+
+		# QSyntaxHighlighter queues a call that runs highlightBlock on every block of the document, in Python,
+		# just to find most of them off screen. With an editor that call is dropped and blocks are lexed from
+		# the top in idle time, the ones scrolled to first.
+		self._skipRehighlight = editor is not None and not document.isEmpty()
+
+		self._idleTimer = QTimer(self)
+		self._idleTimer.setInterval(0)
+		self._idleTimer.timeout.connect(self.highlightIdle)
+
+		document.contentsChange.connect(self.onContentsChange)
+		if editor is not None:
+			editor.verticalScrollBar().valueChanged.connect(self.highlightViewport)
+			if self._skipRehighlight:
+				self.schedule(0)
+
+	def event(self, event):
+		# The queued rehighlight from setDocument is the first queued call this object gets
+		if self._skipRehighlight and event.type() == QEvent.MetaCall:
+			self._skipRehighlight = False
+			return True
+
+		return super().event(event)
+
+	def context(self):
+		return self._context
+
+	def lex(self, text: str):
+		return self._lexer(self._context, text).table()
+
+	def isOpen(self, token_text: str):
+		# A token still open at the end of a line carries on over a newline appended to it
+		table = self.lex(token_text + "\n")
+		return len(table) > 0 and table.ends[0] > len(token_text)
+
+	def state(self, opener: str):
+		state = self._states.get(opener)
+		if state is None:
+			state = self._states[opener] = len(self._states) + 1
+			self._openers[state] = opener
+		return state
+
+	def visibleRange(self):
+		editor = self._editor
+		first = editor.firstVisibleBlock().blockNumber()
+		line_height = max(editor.fontMetrics().height(), 1)
+		count = editor.viewport().height() // line_height + 1
+		margin = count * self.viewportMargin
+		return first - margin, first + count + margin
+
+	def highlightBlock(self, text: str):
+		block_number = self.currentBlock().blockNumber()
+
+		if self._editor is not None and block_number != self._forcedBlock:
+			first, last = self.visibleRange()
+			if not first <= block_number <= last:
+				# Unlexed blocks stay that way, a changed state would make Qt carry on to the next block
+				if self.currentBlockState() != self.Unlexed:
+					self.setCurrentBlockState(self.Pending)
+				self.schedule(block_number)
+				return
+
+		previous_state = self.previousBlockState()
+		prefix = self._openers[previous_state] + "\n" if previous_state > self.Clean else ""
+
+		table = self.lex(prefix + text)
+
+		skip = len(prefix)
+		starts, ends, types = table.starts, table.ends, table.types
+		keywords = self._keywords
+		for i in range(len(table)):
+			token_type = types[i]
+			if token_type == TokenType.Identifier and keywords:
+				text_format = self.keywordFormats.get(keywords.get(table.value(i)))
+			else:
+				text_format = self.tokenFormats.get(token_type)
+
+			if text_format is not None:
+				start = max(starts[i] - skip, 0)
+				end = ends[i] - skip
+				if end > start:
+					self.setFormat(start, end - start, text_format)
+
+		state = self.Clean
+		if len(table) and ends[-1] == len(prefix) + len(text) and types[-1] in (TokenType.String, TokenType.Comment):
+			value = table.value(len(table) - 1)
+			if self.isOpen(value):
+				# Still inside the token the previous block left open, or a new one
+				state = previous_state if starts[-1] == 0 and prefix else self.state(value)
+
+		self.setCurrentBlockState(state)
+
+	def schedule(self, block_number: int):
+		if self._firstPending is None or block_number < self._firstPending:
+			self._firstPending = block_number
+
+		if not self._idleTimer.isActive():
+			self._idleTimer.start()
+
+	def onContentsChange(self, position: int, removed: int, added: int):
+		if self._firstPending is not None and self.document() is not None:
+			block_number = self.document().findBlock(position).blockNumber()
+			self._firstPending = min(self._firstPending, max(block_number, 0))
+
+	def rehighlightPending(self, block):
+		self._forcedBlock = block.blockNumber()
+		try:
+			self.rehighlightBlock(block)
+		finally:
+			self._forcedBlock = -1
+
+	def highlightViewport(self):
+		# Scrolled: lex anything now on screen straight away instead of waiting for idle time
+		if self.document() is None:
+			return
+
+		first, last = self.visibleRange()
+		block = self.document().findBlockByNumber(max(first, 0))
+		while block.isValid() and block.blockNumber() <= last:
+			if block.userState() in (self.Unlexed, self.Pending):
+				self.rehighlightPending(block)
+			block = block.next()
+
+	def highlightIdle(self):
+		# Works through pending blocks from the top for a slice of time, so the event loop stays responsive
+		deadline = time.perf_counter() + self.idleBudget
+
+		if self.document() is None:
+			self._idleTimer.stop()
+			return
+
+		block = self.document().findBlockByNumber(self._firstPending or 0)
+		while block.isValid():
+			if block.userState() in (self.Unlexed, self.Pending):
+				self.rehighlightPending(block)
+
+				if time.perf_counter() > deadline:
+					self._firstPending = block.blockNumber() + 1
+					return
+
+			block = block.next()
+
+		self._firstPending = None
+		self._idleTimer.stop()
@@ -1,12 +1,26 @@
-from PySide2.QtGui import QPainter
-from math import log10
+import math
+
+from PySide2.QtGui import QPainter, QPixmap
 
 from PySide2.QtWidgets import QWidget, QPlainTextEdit
-from PySide2.QtCore import QSize, Qt
+from PySide2.QtCore import QEvent, QRectF, QSize, Qt
 
 from ..colours import WhiteSmoke, OuterSpace
 
 
+def _increment(digits: list):
+	# Adds one to a number held as a list of digits, in place
+	i = len(digits) - 1
+	while i >= 0 and digits[i] == 9:
+		digits[i] = 0
+		i -= 1
+
+	if i < 0:
+		digits.insert(0, 1)
+	else:
+		digits[i] += 1
+
+
 class LineNumberArea(QWidget):
 	def __init__(self, parent: QPlainTextEdit):
 		super().__init__(parent)
@@ -15,17 +29,69 @@ class LineNumberArea(QWidget):
 		self.numberColour = WhiteSmoke
 		self.numberAlignment = Qt.AlignCenter
 
+		# Width only changes with the number of digits in the line count
+		self._digits = 0
+		self._width = 0
+
+		# Digits 0-9 pre-rendered side by side, numbers are blitted from it a digit at a time with nothing
+		# allocated per line. Rebuilt when the font or colour changes.
+		self._strip = None
+		self._stripCell = 0
+		self._stripKey = None
+
+	def digitWidth(self):
+		return self.fontMetrics().horizontalAdvance("0")
+
 	def numberWidth(self):
-		block_count = self.parent().blockCount()
-		digit_width = self.fontMetrics().horizontalAdvance("0")
-		return 3 + digit_width * max(int(log10(block_count) + 1), 0)
+		digits = len(str(max(self.parent().blockCount(), 1)))
+		if digits != self._digits:
+			self._digits = digits
+			self._width = 3 + self.digitWidth() * digits
+		return self._width
+
+	def changeEvent(self, event):
+		super().changeEvent(event)
+
+		if event.type() == QEvent.FontChange:
+			self._digits = 0
+			self._stripKey = None
 
 	def sizeHint(self):
 		return QSize(self.numberWidth(), 0)
 
+	def strip(self):
+		# (pixmap, width of a digit's cell in device pixels)
+		ratio = self.devicePixelRatioF()
+		key = (self.font().key(), self.numberColour.rgba(), ratio)
+		if key != self._stripKey:
+			digit_width = self.digitWidth()
+			font_height = self.fontMetrics().height()
+			cell = math.ceil(digit_width * ratio)
+
+			strip = QPixmap(cell * 10, math.ceil(font_height * ratio))
+			strip.setDevicePixelRatio(ratio)
+			strip.fill(Qt.transparent)
+
+			painter = QPainter(strip)
+			try:
+				painter.setFont(self.font())
+				painter.setPen(self.numberColour)
+				for digit in range(10):
+					painter.drawText(QRectF(digit * cell / ratio, 0, digit_width, font_height), Qt.AlignCenter, str(digit))
+			finally:
+				painter.end()
+
+			self._strip = strip
+			self._stripCell = cell
+			self._stripKey = key
+
+		return self._strip, self._stripCell
+
 	def paintEvent(self, event):
 		width = self.width()
-		font_height = self.fontMetrics().height()
+		digit_width = self.digitWidth()
+		strip, cell = self.strip()
+		cell_height = strip.height()
 
 		text_edit = self.parent()
 
@@ -41,17 +107,28 @@ class LineNumberArea(QWidget):
 
 		# Line numbers
 		block = text_edit.firstVisibleBlock()
-		block_number = block.blockNumber()
+		digits = [int(digit) for digit in str(block.blockNumber() + 1)]
 
 		top = int(text_edit.blockBoundingGeometry(block).translated(text_edit.contentOffset()).top())
 		bottom = top + int(text_edit.blockBoundingRect(block).height())
 
-		painter.setPen(self.numberColour)
+		alignment = self.numberAlignment
 		while block.isValid() and top <= event_rect_bottom:
 			if block.isVisible() and bottom >= event_rect_top:
-				painter.drawText(0, top, width, font_height, self.numberAlignment, str(block_number + 1))
+				number_width = digit_width * len(digits)
+
+				if alignment & Qt.AlignLeft:
+					x = 0
+				elif alignment & Qt.AlignRight:
+					x = width - number_width
+				else:
+					x = (width - number_width) // 2
+
+				for digit in digits:
+					painter.drawPixmap(x, top, strip, digit * cell, 0, cell, cell_height)
+					x += digit_width
 
 			block = block.next()
 			top = bottom
 			bottom = top + int(text_edit.blockBoundingRect(block).height())
-			block_number += 1
+			_increment(digits)
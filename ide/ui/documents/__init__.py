@@ -1 +1,2 @@
 from .document import Document, TextDocument, CodeDocument, ImageDocument, BinaryDocument
+from .loader import DocumentLoader
@@ -1,16 +1,43 @@
+import io
+import codecs
 import logging
+import mmap
+from functools import lru_cache
 from pathlib import PurePath, Path
 from abc import abstractmethod
 
-from PySide2.QtGui import QImageReader, QPixmap, QTextDocument
+from PySide2.QtCore import QSize
+from PySide2.QtGui import QImageReader, QPixmap, QPixmapCache, QTextCursor, QTextDocument
+from PySide2.QtWidgets import QPlainTextDocumentLayout
 
-from ide.io import is_binary_string
-from ide.lang import language_extensions
+from ide.io import Fetch, HttpCache, SniffResult, sniff
+from ide.lang import language_extensions, detect_language
+from ide.string import LineIndex, PieceTable
+
+from .imaging import decode_image, fitted_size, image_size
+from .loader import DocumentLoader
 
 
 documents = {}
 logger = logging.getLogger(__name__)
 
+# Lowercase suffix to document class, built on first lookup
+_suffix_index = None
+_suffix_index_languages = 0
+
+
+def _suffix_candidates(name: str):
+	# Longest compound suffix first, so ".tar.gz" wins over ".gz"
+	suffixes = PurePath(name.lower()).suffixes
+	for i in range(len(suffixes)):
+		yield "".join(suffixes[i:])
+
+
+@lru_cache(maxsize=None)
+def _image_extensions():
+	# Asking Qt loads the image format plugins, so put it off until something needs it
+	return tuple("." + f.data().decode("utf-8").lower() for f in QImageReader.supportedImageFormats())
+
 
 class Document:
 	def __init__(self, path=None):
@@ -24,6 +51,7 @@ class Document:
 		if name.lower() not in documents:
 			logger.debug(f"Registered document type '{name}'.")
 			documents[name.lower()] = cls
+			Document.invalidateIndex()
 		else:
 			logger.error(f"Conflict with document types: '{name}' already exists in registry.")
 
@@ -39,14 +67,45 @@ class Document:
 	def canSave(self):
 		return self.hasPath() and self._path.is_file()
 
+	def title(self):
+		return self._path.name if self.hasPath() else "???"
+
+	@staticmethod
+	def suffixes():
+		return ()
+
+	@staticmethod
+	def invalidateIndex():
+		global _suffix_index
+		_suffix_index = None
+
+	@staticmethod
+	def suffixIndex():
+		global _suffix_index, _suffix_index_languages
+
+		# Languages can register after the index was built, code documents take their suffixes
+		if _suffix_index is None or _suffix_index_languages != len(language_extensions):
+			index = {}
+			for document in documents.values():
+				for suffix in document.suffixes():
+					# Registration order decides between classes claiming the same suffix
+					index.setdefault(suffix.lower(), document)
+
+			_suffix_index = index
+			_suffix_index_languages = len(language_extensions)
+
+		return _suffix_index
+
 	@staticmethod
 	def detectTypeFromName(name: str):
-		for document in documents.values():
-			if document.detectTypeFromName(name):
+		index = Document.suffixIndex()
+		for suffix in _suffix_candidates(name):
+			document = index.get(suffix)
+			if document is not None:
 				return document
 
 	@staticmethod
-	def detectTypeFromSample(sample):
+	def detectTypeFromSample(sample: SniffResult):
 		for document in documents.values():
 			if document.detectTypeFromSample(sample):
 				return document
@@ -55,39 +114,269 @@ class Document:
 	def reload(self):
 		pass
 
+	# Background loading, see DocumentLoader. readChunks runs on a pool thread and yields
+	# (chunk, bytes read so far); everything else runs on the GUI thread. Documents that are
+	# cheap to open read nothing up front and reload once the loader finishes.
+	def readChunks(self):
+		return ()
+
+	def loadSize(self):
+		# Bytes readChunks is going to read, 0 when not known
+		try:
+			return self._path.stat().st_size if self.hasPath() else 0
+		except OSError:
+			return 0
+
+	def beginLoad(self):
+		pass
+
+	def receiveChunk(self, chunk):
+		pass
+
+	def finishLoad(self):
+		self.reload()
+
 
 class TextDocument(Document, name="Text"):
+	# Characters handed to the GUI thread at a time while loading
+	chunkSize = 1 << 15
+
+	# Files from this size on open in large-file mode: a first screen straight away, the rest streamed
+	# in behind it, and no syntax highlighting
+	largeFileSize = 32 << 20
+
+	# Characters read for the first screen in large-file mode
+	firstScreenSize = 1 << 14
+
 	def __init__(self, path=None):
 		super().__init__(path)
 
+		# Shown by QPlainTextEdit, which only takes documents with a plain text layout
 		self._document = QTextDocument()
+		self._document.setDocumentLayout(QPlainTextDocumentLayout(self._document))
+		self._loader = None
+		self._encoding = "utf-8"
+
+		self._url = None
+		self._cache = None
+		self._fetch = None
 
 	def document(self):
 		return self._document
 
-	@staticmethod
-	def detectTypeFromName(name: str):
-		return PurePath(name).suffix in [".txt", ".log"]
+	def url(self):
+		return self._url
 
-	@staticmethod
-	def detectTypeFromSample(sample):
+	def setUrl(self, url: str, cache: HttpCache = None):
+		# Loads from a url instead of a file, through cache when given
+		self._url = url
+		self._cache = cache
+
+	def title(self):
+		if self._url:
+			return self._url.rsplit("/", 1)[-1] + " (URL)"
+		return super().title()
+
+	def loadSize(self):
+		if self._url:
+			return (self._fetch.size or 0) if self._fetch else 0
+		return super().loadSize()
+
+	def encoding(self):
+		return self._encoding
+
+	def setText(self, text: str):
+		self._document.setPlainText(text)
+
+	def language(self):
+		# Plain text has no language, see CodeDocument
+		return None
+
+	def isLarge(self):
 		try:
-			sample.decode()
-		except (UnicodeDecodeError, AttributeError):
+			return self.hasPath() and self._path.stat().st_size >= self.largeFileSize
+		except OSError:
 			return False
 
-		return True
+	@staticmethod
+	def suffixes():
+		return ".txt", ".log"
+
+	@staticmethod
+	def detectTypeFromSample(sample: SniffResult):
+		return sample.kind == "text"
 
 	def reload(self):
-		with self.path().open("r") as f:
-			self._document.setPlainText(f.read())
+		if self.isLarge() or self._url:
+			if self._loader is not None:
+				self._loader.cancel()
+
+			self._loader = DocumentLoader(self)
+			self._loader.start(wait=True)
+			return
+
+		sniffed = sniff(self.path())
+		encoding = self._encoding = sniffed.encoding or "utf-8"
+
+		if sniffed.complete:
+			# The sniffer already read the whole file
+			text = sniffed.sample[sniffed.bom:].decode(encoding, errors="replace")
+			text = io.StringIO(text, newline=None).read()
+		else:
+			with self.path().open("r", encoding=encoding, errors="replace") as f:
+				f.seek(sniffed.bom)
+				text = f.read()
+
+		self.setText(text)
+
+	def readChunks(self):
+		if self._url:
+			yield from self.readUrlChunks()
+			return
+
+		sniffed = sniff(self.path())
+		self._encoding = sniffed.encoding or "utf-8"
+
+		# newline=None joins a \r\n split between two reads
+		with self.path().open("r", encoding=self._encoding, errors="replace") as f:
+			f.seek(sniffed.bom)
+
+			# A small first chunk gets something on screen before the big ones are read
+			size = self.firstScreenSize
+			while True:
+				text = f.read(size)
+				if not text:
+					break
+				yield text, f.buffer.tell()
+
+				size = self.chunkSize
+
+	def readUrlChunks(self):
+		fetch = self._fetch = Fetch(self._url, self._cache)
+
+		decoder = None
+		position = 0
+		for data in fetch:
+			if decoder is None:
+				# Known once the response has started
+				self._encoding = fetch.charset() or "utf-8"
+				try:
+					decoder = codecs.getincrementaldecoder(self._encoding)(errors="replace")
+				except LookupError:
+					self._encoding = "utf-8"
+					decoder = codecs.getincrementaldecoder(self._encoding)(errors="replace")
+
+				decoder = io.IncrementalNewlineDecoder(decoder, translate=True)
+
+			position += len(data)
+			text = decoder.decode(data)
+			if text:
+				yield text, position
+
+		if decoder is not None:
+			text = decoder.decode(b"", final=True)
+			if text:
+				yield text, position
+
+	def beginLoad(self):
+		self._document.clear()
+		self._document.setUndoRedoEnabled(False)
+
+	def receiveChunk(self, chunk):
+		cursor = QTextCursor(self._document)
+		cursor.movePosition(QTextCursor.End)
+		cursor.insertText(chunk)
+
+	def finishLoad(self):
+		self._document.setUndoRedoEnabled(True)
+		self._document.setModified(False)
 
 
 class CodeDocument(TextDocument, name="Source Code"):
 	def __init__(self, path=None):
 		super().__init__(path)
 
-		self._language = None
+		self._language = detect_language(path.name) if path else None
+
+		# The text itself, kept in step with the QTextDocument so nothing outside the UI has to
+		# go through toPlainText()
+		self._buffer = PieceTable()
+		self._lines = LineIndex()
+		self._syncing = True
+		self._document.contentsChange.connect(self.onContentsChange)
+
+	def setUrl(self, url: str, cache: HttpCache = None):
+		super().setUrl(url, cache)
+		self._language = detect_language(url.rsplit("/", 1)[-1])
+
+	def buffer(self):
+		return self._buffer
+
+	def lines(self):
+		return self._lines
+
+	def text(self, start: int = 0, end: int = None):
+		return self._buffer.text(start, end)
+
+	def snapshot(self):
+		# Frozen copy for background work, costs nothing to take
+		return self._buffer.snapshot()
+
+	def onContentsChange(self, position: int, removed: int, added: int):
+		if not self._syncing:
+			return
+
+		# setPlainText and friends count the final paragraph separator as removed and added,
+		# so work the edit out from the lengths instead
+		length = self._document.characterCount() - 1
+		added = max(min(added, length - position), 0)
+		removed = len(self._buffer) - (length - added)
+
+		if removed < 0 or position + removed > len(self._buffer):
+			logger.warning("Lost track of document changes, copying the whole text.")
+			text = self._document.toPlainText()
+			self._buffer = PieceTable(text)
+			self._lines = LineIndex(text)
+			return
+
+		text = ""
+		if added:
+			cursor = QTextCursor(self._document)
+			cursor.setPosition(position)
+			cursor.setPosition(position + added, QTextCursor.KeepAnchor)
+			text = cursor.selectedText().replace("\u2029", "\n")
+
+		self._buffer.replace(position, removed, text)
+		self._lines.update(position, removed, text)
+
+	def setText(self, text: str):
+		# Already have the text, no need to read it back out of the QTextDocument
+		self._syncing = False
+		try:
+			super().setText(text)
+		finally:
+			self._syncing = True
+
+		self._buffer = PieceTable(text)
+		self._lines = LineIndex(text)
+
+	def receiveChunk(self, chunk):
+		self._syncing = False
+		try:
+			super().receiveChunk(chunk)
+		finally:
+			self._syncing = True
+
+		self._lines.update(len(self._buffer), 0, chunk)
+		self._buffer.insert(len(self._buffer), chunk)
+
+	def save(self):
+		# Written out piece by piece, without joining the text first
+		with self.path().open("w", encoding=self._encoding) as f:
+			for chunk in self._buffer.chunks():
+				f.write(chunk)
+
+		self._document.setModified(False)
 
 	def language(self):
 		return self._language
@@ -96,17 +385,22 @@ class CodeDocument(TextDocument, name="Source Code"):
 		self._language = language
 
 	@staticmethod
-	def detectTypeFromName(name: str):
-		return PurePath(name).suffix in language_extensions
+	def suffixes():
+		return language_extensions
 
 
 class ImageDocument(Document, name="Image"):
-	extensions = ["." + f.data().decode("utf-8") for f in QImageReader.supportedImageFormats()]
+	# Decoded pixmaps are shared between tabs through QPixmapCache, capped at this many KiB
+	pixmapCacheLimit = 256 << 10
 
 	def __init__(self, path=None):
 		super().__init__(path)
 
-		self._pixmap = QPixmap(str(path)) if path else QPixmap()
+		# Nothing is decoded until the document is loaded, and then only at the size it's shown at
+		self._pixmap = QPixmap()
+		self._targetSize = QSize()
+		self._decodeSize = QSize()
+		self._cached = False
 
 	def pixmap(self):
 		return self._pixmap
@@ -114,16 +408,66 @@ class ImageDocument(Document, name="Image"):
 	def setPixmap(self, pixmap):
 		self._pixmap = pixmap
 
+	def targetSize(self):
+		return self._targetSize
+
+	def setTargetSize(self, size: QSize):
+		# Largest size worth decoding at, an invalid size means full resolution
+		self._targetSize = QSize(size)
+
+	def imageSize(self):
+		return image_size(self.path()) if self.hasPath() else QSize()
+
+	def needsReload(self, size: QSize):
+		# Whether showing at size would need more detail than has been decoded
+		wanted = fitted_size(self.imageSize(), size)
+		return wanted.width() > self._pixmap.width() or wanted.height() > self._pixmap.height()
+
+	def cacheKey(self):
+		try:
+			mtime = self._path.stat().st_mtime_ns
+		except OSError:
+			mtime = 0
+		return f"{self._path}|{mtime}|{self._decodeSize.width()}x{self._decodeSize.height()}"
+
 	@staticmethod
-	def detectTypeFromName(name: str):
-		return PurePath(name).suffix in ImageDocument.extensions
+	def suffixes():
+		return _image_extensions()
 
 	@staticmethod
-	def detectTypeFromSample(sample):
-		return False
+	def detectTypeFromSample(sample: SniffResult):
+		return sample.kind == "image"
 
 	def reload(self):
-		self._pixmap = QPixmap(str(self.path()))
+		self.beginLoad()
+		for image, _ in self.readChunks():
+			self.receiveChunk(image)
+
+	def beginLoad(self):
+		if QPixmapCache.cacheLimit() != self.pixmapCacheLimit:
+			QPixmapCache.setCacheLimit(self.pixmapCacheLimit)
+
+		self._decodeSize = fitted_size(self.imageSize(), self._targetSize)
+
+		pixmap = QPixmapCache.find(self.cacheKey())
+		self._cached = pixmap is not None and not pixmap.isNull()
+		if self._cached:
+			self._pixmap = pixmap
+
+	def readChunks(self):
+		# QPixmap belongs to the GUI thread, QImage can be decoded anywhere
+		if self._cached:
+			return
+
+		image = decode_image(self.path(), self._decodeSize)
+		yield image, self.path().stat().st_size
+
+	def receiveChunk(self, chunk):
+		self._pixmap = QPixmap.fromImage(chunk)
+		QPixmapCache.insert(self.cacheKey(), self._pixmap)
+
+	def finishLoad(self):
+		pass
 
 
 class BinaryDocument(Document, name="Binary"):
@@ -131,15 +475,45 @@ class BinaryDocument(Document, name="Binary"):
 		super().__init__(path)
 
 		self._data = b""
+		self._mmap = None
+
+	def data(self):
+		# Whole contents without copying, pages are only read in from the file when touched
+		return memoryview(self._data)
+
+	def size(self):
+		return len(self._data)
+
+	def view(self, offset: int, length: int):
+		return memoryview(self._data)[offset:offset + length]
+
+	def slice(self, offset: int, length: int):
+		return self._data[offset:offset + length]
 
 	@staticmethod
-	def detectTypeFromName(name):
-		return PurePath(name).suffix in [".exe", ".dll", ".so", ".bin"]
+	def suffixes():
+		return ".exe", ".dll", ".so", ".bin", ".zip", ".gz", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz"
 
 	@staticmethod
-	def detectTypeFromSample(sample):
-		return is_binary_string(sample)
+	def detectTypeFromSample(sample: SniffResult):
+		return sample.kind == "binary"
 
 	def reload(self):
+		self.close()
+
 		with self.path().open("rb") as f:
-			self._data = f.read()
+			# Empty files can't be mapped
+			if f.seek(0, 2):
+				self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+				self._data = self._mmap
+
+	def close(self):
+		if self._mmap is not None:
+			try:
+				self._mmap.close()
+			except BufferError:
+				# Views handed out are still alive, the mapping goes once they do
+				pass
+
+			self._mmap = None
+			self._data = b""
@@ -0,0 +1,33 @@
+from PySide2.QtCore import QSize, Qt
+from PySide2.QtGui import QImageReader
+
+
+def image_size(path):
+	# Read from the header, nothing is decoded
+	return QImageReader(str(path)).size()
+
+
+def fitted_size(size: QSize, target: QSize):
+	# The image size scaled down to fit target, never up
+	if not size.isValid() or not target.isValid() or target.isEmpty():
+		return size
+	if size.width() <= target.width() and size.height() <= target.height():
+		return size
+	return size.scaled(target, Qt.KeepAspectRatio)
+
+
+def decode_image(path, target: QSize = None):
+	# Decodes an image at no more than target, safe off the GUI thread. Formats that can (JPEG, SVG)
+	# decode straight to the smaller size, the others decode whole and Qt scales the result.
+	reader = QImageReader(str(path))
+	size = reader.size()
+	scaled = fitted_size(size, target) if target is not None else size
+
+	if size.isValid() and scaled != size:
+		reader.setScaledSize(scaled)
+
+	image = reader.read()
+	if image.isNull():
+		raise OSError(f"Unable to read image '{path}': {reader.errorString()}")
+
+	return image
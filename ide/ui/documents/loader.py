@@ -0,0 +1,172 @@
+import queue
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide2.QtCore import QObject, QTimer, Signal
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _loader_executor():
+	global _executor
+
+	if _executor is None:
+		_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="DocumentLoader")
+
+	return _executor
+
+
+class DocumentLoader(QObject):
+	# Reads a document on a pool thread and hands it over to the GUI thread a chunk at a time.
+	# Chunks are applied for at most frameBudget seconds per event loop pass, so the window keeps
+	# repainting while a big file streams in.
+	progressChanged = Signal(int, int)
+	finished = Signal()
+	failed = Signal(str)
+	cancelled = Signal()
+
+	# Raised from the pool thread, wakes the drain timer on the GUI thread
+	_ready = Signal()
+
+	# Half of a 60 Hz frame, the rest is left for painting and highlighting
+	frameBudget = 0.008
+
+	# Chunks read ahead of the GUI thread before the reader waits
+	queueSize = 16
+
+	def __init__(self, document, parent=None):
+		super().__init__(parent)
+
+		self._document = document
+		self._queue = queue.Queue(self.queueSize)
+		self._cancel = threading.Event()
+		self._future = None
+		self._done = False
+
+		self._size = document.loadSize()
+
+		self._timer = QTimer(self)
+		self._timer.setInterval(0)
+		self._timer.timeout.connect(self.drain)
+
+		self._ready.connect(self.wake)
+
+	def document(self):
+		return self._document
+
+	def size(self):
+		# Some sources only know their size once reading has started
+		if not self._size:
+			self._size = self._document.loadSize()
+		return self._size
+
+	def isRunning(self):
+		return self._future is not None and not self._done
+
+	def start(self, wait: bool = False):
+		# With wait set the first chunk is applied before returning, so the tab opens with a screenful in it
+		self._document.beginLoad()
+		self._future = _loader_executor().submit(self._read)
+
+		if wait:
+			try:
+				item = self._queue.get(timeout=1.0)
+			except queue.Empty:
+				return
+
+			if not self._apply(*item):
+				self.progressChanged.emit(item[2], self.size())
+
+	def cancel(self):
+		if not self.isRunning():
+			return
+
+		self._cancel.set()
+		self._done = True
+		self._timer.stop()
+
+		# Unblock the reader if it's waiting on a full queue
+		while True:
+			try:
+				self._queue.get_nowait()
+			except queue.Empty:
+				break
+
+		self._document.finishLoad()
+		self.cancelled.emit()
+
+	def _put(self, item):
+		# Waits for room in the queue, giving up once cancelled
+		while not self._cancel.is_set():
+			try:
+				self._queue.put(item, timeout=0.1)
+			except queue.Full:
+				continue
+
+			try:
+				self._ready.emit()
+			except RuntimeError:
+				# The loader was deleted with its tab
+				self._cancel.set()
+
+			return
+
+	def _read(self):
+		# Pool thread
+		try:
+			for chunk, position in self._document.readChunks():
+				if self._cancel.is_set():
+					return
+				self._put(("chunk", chunk, position))
+		except Exception as e:
+			self._put(("error", str(e), 0))
+		else:
+			self._put(("done", None, 0))
+
+	def wake(self):
+		if not self._done and not self._timer.isActive():
+			self._timer.start()
+
+	def _apply(self, kind: str, chunk, position: int):
+		# Returns whether loading is over
+		if kind == "chunk":
+			self._document.receiveChunk(chunk)
+			return False
+
+		self._done = True
+		self._timer.stop()
+		self._document.finishLoad()
+
+		if kind == "done":
+			self.progressChanged.emit(self.size(), self.size())
+			self.finished.emit()
+		else:
+			logger.error(f"Failed to load '{self._document.title()}': {chunk}")
+			self.failed.emit(chunk)
+
+		return True
+
+	def drain(self):
+		deadline = time.perf_counter() + self.frameBudget
+
+		position = None
+		while not self._done:
+			try:
+				kind, chunk, position = self._queue.get_nowait()
+			except queue.Empty:
+				self._timer.stop()
+				break
+
+			if self._apply(kind, chunk, position):
+				return
+
+			if time.perf_counter() > deadline:
+				break
+
+		if position is not None:
+			self.progressChanged.emit(position, self.size())
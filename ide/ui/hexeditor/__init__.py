@@ -0,0 +1 @@
+from .hexeditor import HexEditor
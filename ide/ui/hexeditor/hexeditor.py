@@ -0,0 +1,138 @@
+from collections import OrderedDict
+
+from PySide2.QtCore import Qt
+from PySide2.QtGui import QFont, QPainter
+from PySide2.QtWidgets import QAbstractScrollArea, QInputDialog
+
+from ..colours import DarkGray, OuterSpace, WhiteSmoke
+from ..documents import BinaryDocument
+
+
+# Bytes shown as themselves in the text column, everything else as a dot
+_printable = bytes(c if 0x20 <= c < 0x7f else 0x2e for c in range(256))
+
+
+class HexEditor(QAbstractScrollArea):
+	# Only the rows on screen are read and formatted, straight out of the document's mapping, so the
+	# file size doesn't matter. Formatted rows are kept in an LRU so scrolling back and forth is free.
+	bytesPerRow = 16
+
+	# Formatted rows kept
+	rowCacheSize = 4096
+
+	# Scroll bars hold an int, past this many rows each step covers several
+	maxScrollRows = 1 << 30
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+
+		self._document = BinaryDocument()
+		self._rows = OrderedDict()
+		self._rowScale = 1
+
+		self.setFont(QFont("Source Code Pro", 12))
+		self.viewport().setAutoFillBackground(False)
+
+		self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+
+	def document(self):
+		return self._document
+
+	def setDocument(self, document: BinaryDocument):
+		self._document = document
+		self._rows.clear()
+		self.updateScrollBar()
+		self.viewport().update()
+
+	def rowCount(self):
+		return (self._document.size() + self.bytesPerRow - 1) // self.bytesPerRow
+
+	def visibleRowCount(self):
+		return max(self.viewport().height() // self.fontMetrics().height(), 1)
+
+	def firstVisibleRow(self):
+		scroll_bar = self.verticalScrollBar()
+		if scroll_bar.value() == scroll_bar.maximum():
+			# Scaled steps can fall short of the last rows
+			return max(self.rowCount() - self.visibleRowCount(), 0)
+		return scroll_bar.value() * self._rowScale
+
+	def updateScrollBar(self):
+		rows = self.rowCount()
+		visible = self.visibleRowCount()
+
+		self._rowScale = max(-(-rows // self.maxScrollRows), 1)
+
+		scroll_bar = self.verticalScrollBar()
+		scroll_bar.setRange(0, max(rows - visible, 0) // self._rowScale)
+		scroll_bar.setPageStep(max(visible // self._rowScale, 1))
+		scroll_bar.setSingleStep(1)
+
+	def scrollToOffset(self, offset: int):
+		# Jumping anywhere is only a scroll bar move, nothing before the offset is read
+		offset = min(max(offset, 0), max(self._document.size() - 1, 0))
+		self.verticalScrollBar().setValue(offset // self.bytesPerRow // self._rowScale)
+
+	def scrollToOffsetWithDialog(self):
+		text, ok = QInputDialog.getText(self, "Go to offset", "Offset (decimal, or hex with 0x):")
+		if ok and text:
+			try:
+				self.scrollToOffset(int(text.strip(), 0))
+			except ValueError:
+				pass
+
+	def formatRow(self, row: int):
+		text = self._rows.get(row)
+		if text is not None:
+			self._rows.move_to_end(row)
+			return text
+
+		offset = row * self.bytesPerRow
+		data = bytes(self._document.view(offset, self.bytesPerRow))
+
+		hex_width = self.bytesPerRow * 3 - 1
+		hex_text = " ".join(f"{b:02X}" for b in data)
+		text = f"{offset:010X}  {hex_text:<{hex_width}}  {data.translate(_printable).decode('ascii')}"
+
+		self._rows[row] = text
+		if len(self._rows) > self.rowCacheSize:
+			self._rows.popitem(last=False)
+
+		return text
+
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+		self.updateScrollBar()
+
+	def keyPressEvent(self, event):
+		if event.key() == Qt.Key_G and event.modifiers() & Qt.ControlModifier:
+			self.scrollToOffsetWithDialog()
+		elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+			self.scrollToOffset(0)
+		elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+			self.scrollToOffset(self._document.size())
+		else:
+			super().keyPressEvent(event)
+
+	def paintEvent(self, event):
+		painter = QPainter(self.viewport())
+		painter.fillRect(event.rect(), OuterSpace)
+
+		line_height = self.fontMetrics().height()
+		ascent = self.fontMetrics().ascent()
+		address_width = self.fontMetrics().horizontalAdvance("0" * 10)
+
+		rows = self.rowCount()
+		first = self.firstVisibleRow()
+		last = min(first + self.visibleRowCount() + 1, rows)
+
+		y = ascent
+		for row in range(first, last):
+			text = self.formatRow(row)
+
+			painter.setPen(DarkGray)
+			painter.drawText(4, y, text[:10])
+			painter.setPen(WhiteSmoke)
+			painter.drawText(4 + address_width, y, text[10:])
+
+			y += line_height
@@ -1,13 +1,12 @@
 import logging
 from pathlib import Path
 
-import requests
-
+from PySide2.QtCore import QStandardPaths
 from PySide2.QtGui import QCloseEvent, QIcon, QKeySequence, QPixmap
 from PySide2.QtWidgets import QMainWindow, QAction, QFileDialog
 from PySide2.QtWidgets import QInputDialog, QLineEdit, QApplication
 
-from ide.io import is_binary_string
+from ide.io import HttpCache, sniff
 
 from .util import centralisedRect
 from .maintabbar import MainTabBar
@@ -31,6 +30,8 @@ class IdeWindow(QMainWindow):
 		self.logger = logging.getLogger(f"{__name__}<{self.window_id}>")
 		self.logger.debug("Window created.")
 
+		self.httpCache = HttpCache(Path(QStandardPaths.writableLocation(QStandardPaths.CacheLocation)) / "http")
+
 		self.fileMenu = None
 		self.aboutMenu = None
 		self.createActions()
@@ -119,7 +120,7 @@ class IdeWindow(QMainWindow):
 		self.logger.debug("Close active tab requested.")
 		self.tabs.closeActiveTab()
 
-	def openFile(self, path: str):
+	def openFile(self, path: str, activate: bool = True):
 		path = Path(path)
 		self.logger.debug(f"Attempting to open file at '{path}'...")
 
@@ -128,8 +129,7 @@ class IdeWindow(QMainWindow):
 			if not document_class:
 				self.logger.warning(f"Failed to recognise file type from name for '{path}', checking contents...")
 
-				with path.open("rb") as f:
-					document_class = Document.detectTypeFromSample(f.read(1024))
+				document_class = Document.detectTypeFromSample(sniff(path))
 
 			# todo: mimetypes
 
@@ -139,8 +139,7 @@ class IdeWindow(QMainWindow):
 				self.logger.debug(f"File at '{path}' appears to have type '{document_class.name}'.")
 
 				document = document_class(path)
-				document.reload()
-				self.tabs.openDocument(document)
+				self.tabs.addDocument(document, activate)
 
 		else:
 			self.logger.error(f"Attempted to open non-file at '{path}'.")
@@ -159,25 +158,10 @@ class IdeWindow(QMainWindow):
 	def openFileFromUrl(self, url: str):
 		self.logger.debug(f"Attempting to open URL at '{url}'...")
 
-		try:
-			r = requests.get(url)
-
-			self.logger.info(f"Request to '{url}': got response, status: {r.status_code}, time taken: {r.elapsed}.")
-			self.logger.debug(f"Response headers: {r.headers}")
-		except ConnectionError as e:
-			self.logger.warning(f"Request to '{url}': connection failed.")
-			self.logger.warning(e)
-		except TimeoutError as e:
-			self.logger.warning(f"Request to '{url}': timed out.")
-			self.logger.warning(e)
-
-		if r.status_code == requests.codes.ok:
-			editor = self.tabs.createEditor(url.rsplit("/", 1)[-1] + " (URL)")
-			editor.setPlainText(r.text)
-
-			self.tabs.setCurrentWidget(editor)
-		else:
-			self.logger.error(f"Request to '{url}': received non-ok status code {r.status_code}.")
+		# Downloaded in the background and streamed into the tab, failures are logged by the loader
+		document = CodeDocument()
+		document.setUrl(url, self.httpCache)
+		self.tabs.loadDocument(document)
 
 	def openFileFromUrlWithDialog(self):
 		text =\
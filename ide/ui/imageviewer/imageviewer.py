@@ -1,14 +1,25 @@
+from PySide2.QtCore import QTimer
 from PySide2.QtGui import Qt
 from PySide2.QtWidgets import QLabel
 
-from ..documents import ImageDocument
+from ..documents import DocumentLoader, ImageDocument
 
 
 class ImageViewer(QLabel):
+	# Images are decoded at the size they're shown at, when the viewer grows past that they're
+	# decoded again in the background
+	resizeDelay = 150
+
 	def __init__(self, parent=None):
 		super().__init__(parent)
 
 		self._document = ImageDocument()
+		self._loader = None
+
+		self._resizeTimer = QTimer(self)
+		self._resizeTimer.setSingleShot(True)
+		self._resizeTimer.setInterval(self.resizeDelay)
+		self._resizeTimer.timeout.connect(self.refresh)
 
 		self.setAlignment(Qt.AlignCenter)
 
@@ -18,3 +29,21 @@ class ImageViewer(QLabel):
 	def setDocument(self, document: ImageDocument):
 		self._document = document
 		self.setPixmap(document.pixmap())
+
+	def resizeEvent(self, event):
+		super().resizeEvent(event)
+
+		if self._document.hasPath():
+			self._resizeTimer.start()
+
+	def refresh(self):
+		# Nothing to do while the first load is still running
+		if self._document.pixmap().isNull() or (self._loader is not None and self._loader.isRunning()):
+			return
+
+		if self._document.needsReload(self.size()):
+			self._document.setTargetSize(self.size())
+
+			self._loader = DocumentLoader(self._document, self)
+			self._loader.finished.connect(lambda: self.setDocument(self._document))
+			self._loader.start()
@@ -1,15 +1,35 @@
+import time
 import logging
 
+from PySide2.QtCore import QTimer
 from PySide2.QtGui import QIcon, QPixmap
-from PySide2.QtWidgets import QTabWidget
+from PySide2.QtWidgets import QProgressBar, QTabBar, QTabWidget, QWidget
 
 from .codeeditor import CodeEditor
 from .imageviewer import ImageViewer
+from .hexeditor import HexEditor
 
-from .documents import Document, TextDocument, ImageDocument
+from .documents import Document, DocumentLoader, TextDocument, ImageDocument, BinaryDocument
+
+
+class TabPlaceholder(QWidget):
+	# Stands in for a tab's widget until the tab is shown, or after it was unloaded. Holds on to
+	# the document and whatever view state is needed to put the tab back the way it was.
+	def __init__(self, document: Document, loaded: bool = False, state: dict = None, parent=None):
+		super().__init__(parent)
+
+		self._document = document
+		self.loaded = loaded
+		self.state = state or {}
+
+	def document(self):
+		return self._document
 
 
 class MainTabBar(QTabWidget):
+	# Tabs that haven't been shown for this many seconds give up their widgets
+	unloadAfter = 300
+
 	def __init__(self, parent):
 		super().__init__(parent)
 
@@ -17,9 +37,23 @@ class MainTabBar(QTabWidget):
 
 		self.editorIcon = QIcon("icons/script_edit.png")
 		self.imageIcon = QIcon("icons/image.png")
+		self.binaryIcon = QIcon("icons/brick.png")
+
+		# Loaders still filling in a tab, by tab widget
+		self.loaders = {}
+
+		# When each tab widget was last current
+		self.lastUsed = {}
+		self._materializing = False
+
+		self.unloadTimer = QTimer(self)
+		self.unloadTimer.setInterval(self.unloadAfter * 1000 // 4)
+		self.unloadTimer.timeout.connect(self.unloadIdleTabs)
+		self.unloadTimer.start()
 
 		self.setTabsClosable(True)
 		self.tabCloseRequested.connect(self.closeTab)
+		self.currentChanged.connect(self.onCurrentChanged)
 
 	def createEditorIfNotExists(self):
 		if self.count() < 1:
@@ -45,6 +79,9 @@ class MainTabBar(QTabWidget):
 	def createImageViewer(self, name: str = "", index: int = -1):
 		return self.createTab(ImageViewer(self), name, index, self.imageIcon)
 
+	def createHexEditor(self, name: str = "", index: int = -1):
+		return self.createTab(HexEditor(self), name, index, self.binaryIcon)
+
 	def activeTab(self):
 		return self.currentWidget()
 
@@ -54,20 +91,198 @@ class MainTabBar(QTabWidget):
 	def closeTab(self, index: int):
 		self.logger.debug(f"Closing tab at index {index} ('{self.tabText(index)}').")
 
+		widget = self.widget(index)
+		loader = self.loaders.pop(widget, None)
+		if loader is not None:
+			loader.cancel()
+
+		self.lastUsed.pop(widget, None)
 		self.removeTab(index)
+
+		# removeTab leaves the widget alive, and a binary document its mapping open
+		if isinstance(widget.document(), BinaryDocument):
+			widget.document().close()
+		widget.deleteLater()
+
 		self.createEditorIfNotExists()
 
-	def openDocument(self, document):
+	def openDocument(self, document, index: int = -1):
 		if isinstance(document, TextDocument):
-			# todo: move: document.hasPath() and document.path().name or "???"
-			editor = self.createEditor(document.path().name if document.hasPath() else "???")
+			editor = self.createEditor(document.title(), index)
 			editor.setDocument(document)
 
 			self.setCurrentWidget(editor)
+			return editor
 		elif isinstance(document, ImageDocument):
-			viewer = self.createImageViewer(document.path().name if document.hasPath() else "???")
+			# Decoded no bigger than the tab can show, the viewer asks for more if it grows
+			document.setTargetSize(self.contentsRect().size())
+
+			viewer = self.createImageViewer(document.title(), index)
 			viewer.setDocument(document)
 
 			self.setCurrentWidget(viewer)
+			return viewer
+		elif isinstance(document, BinaryDocument):
+			editor = self.createHexEditor(document.title(), index)
+			editor.setDocument(document)
+
+			self.setCurrentWidget(editor)
+			return editor
 		else:
 			self.logger.error(f"Unable to open unsupported document type '{document.name}'.")
+
+	def addDocument(self, document, activate: bool = True):
+		# Only a placeholder until the tab is first shown, so opening many files costs little more than one
+		if isinstance(document, ImageDocument):
+			icon = self.imageIcon
+		elif isinstance(document, BinaryDocument):
+			icon = self.binaryIcon
+		else:
+			icon = self.editorIcon
+
+		placeholder = self.createTab(TabPlaceholder(document, parent=self), document.title(), -1, icon)
+
+		if activate:
+			self.setCurrentWidget(placeholder)
+
+		return placeholder
+
+	def loadDocument(self, document, index: int = -1):
+		# Opens the tab straight away and fills it in from a background loader, closing the tab cancels it
+		widget = self.openDocument(document, index)
+		if widget is None:
+			return
+
+		progress = QProgressBar()
+		progress.setRange(0, 100)
+		progress.setTextVisible(False)
+		progress.setFixedSize(40, 8)
+		self.tabBar().setTabButton(self.indexOf(widget), QTabBar.LeftSide, progress)
+
+		loader = DocumentLoader(document, widget)
+		loader.progressChanged.connect(lambda done, total: self.onLoadProgress(progress, done, total))
+		loader.finished.connect(lambda: self.onDocumentLoaded(widget))
+		loader.failed.connect(lambda message: self.onDocumentLoaded(widget))
+		loader.cancelled.connect(lambda: self.onDocumentLoaded(widget))
+
+		self.loaders[widget] = loader
+		# Waiting on the network would block the window
+		loader.start(wait=isinstance(document, TextDocument) and not document.url())
+
+		return widget
+
+	@staticmethod
+	def onLoadProgress(progress: QProgressBar, done: int, total: int):
+		# A busy indicator until the size is known
+		progress.setMaximum(100 if total else 0)
+		progress.setValue(min(100 * done // total, 100) if total else 0)
+
+	def onDocumentLoaded(self, widget):
+		loader = self.loaders.pop(widget, None)
+
+		index = self.indexOf(widget)
+		if index >= 0:
+			self.tabBar().setTabButton(index, QTabBar.LeftSide, None)
+
+			# Viewers copy what they show out of the document, editors share it
+			if loader is not None and not isinstance(widget, CodeEditor):
+				widget.setDocument(loader.document())
+
+	def onCurrentChanged(self, index: int):
+		widget = self.widget(index)
+		if widget is None:
+			return
+
+		if isinstance(widget, TabPlaceholder) and not self._materializing:
+			widget = self.materialize(index)
+
+		self.lastUsed[widget] = time.monotonic()
+
+	def materialize(self, index: int):
+		# Swaps a placeholder for the real widget, loading the document if it never was
+		placeholder = self.widget(index)
+		document = placeholder.document()
+
+		self._materializing = True
+		try:
+			# Unloaded images dropped their pixmap, the cache usually still has it, and binary documents
+			# their mapping
+			if not placeholder.loaded or isinstance(document, (ImageDocument, BinaryDocument)):
+				widget = self.loadDocument(document, index)
+			else:
+				widget = self.openDocument(document, index)
+
+			if widget is None:
+				return placeholder
+
+			# The placeholder's text and icon stand, a document without a path would otherwise come back as "???"
+			self.setTabText(self.indexOf(widget), self.tabText(self.indexOf(placeholder)))
+			self.setTabIcon(self.indexOf(widget), self.tabIcon(self.indexOf(placeholder)))
+
+			self.restoreState(widget, placeholder.state)
+
+			self.removeTab(self.indexOf(placeholder))
+			self.lastUsed.pop(placeholder, None)
+			placeholder.deleteLater()
+
+			self.setCurrentWidget(widget)
+		finally:
+			self._materializing = False
+
+		self.logger.debug(f"Materialized tab at {index} ('{self.tabText(index)}').")
+		return widget
+
+	def unload(self, index: int):
+		# Swaps a tab's widget for a placeholder, the document and view state are kept
+		widget = self.widget(index)
+		if isinstance(widget, TabPlaceholder) or widget in self.loaders:
+			return
+
+		document = widget.document()
+		placeholder = TabPlaceholder(document, True, self.saveState(widget), self)
+
+		self._materializing = True
+		try:
+			self.insertTab(index, placeholder, self.tabIcon(index), self.tabText(index))
+			self.removeTab(index + 1)
+		finally:
+			self._materializing = False
+
+		self.lastUsed[placeholder] = self.lastUsed.pop(widget, time.monotonic())
+
+		if isinstance(widget, CodeEditor):
+			widget.detachDocument()
+		elif isinstance(document, ImageDocument):
+			document.setPixmap(QPixmap())
+		elif isinstance(document, BinaryDocument):
+			document.close()
+		widget.deleteLater()
+
+		self.logger.debug(f"Unloaded tab at {index} ('{self.tabText(index)}').")
+
+	def unloadIdleTabs(self):
+		now = time.monotonic()
+		for index in reversed(range(self.count())):
+			widget = self.widget(index)
+			if index == self.currentIndex() or isinstance(widget, TabPlaceholder):
+				continue
+
+			if now - self.lastUsed.get(widget, now) > self.unloadAfter:
+				self.unload(index)
+
+	@staticmethod
+	def saveState(widget):
+		if isinstance(widget, CodeEditor):
+			return {"cursor": widget.textCursor().position(), "scroll": widget.verticalScrollBar().value()}
+		elif isinstance(widget, HexEditor):
+			return {"scroll": widget.verticalScrollBar().value()}
+		return {}
+
+	@staticmethod
+	def restoreState(widget, state: dict):
+		if "cursor" in state:
+			cursor = widget.textCursor()
+			cursor.setPosition(min(state["cursor"], widget.document().document().characterCount() - 1))
+			widget.setTextCursor(cursor)
+		if "scroll" in state:
+			widget.verticalScrollBar().setValue(state["scroll"])
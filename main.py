@@ -57,10 +57,10 @@ if __name__ == "__main__":
 	ide_window = IdeWindow()
 	ide_window.show()
 
-	# Check command line for paths to load
-	for file_name in args.files:
+	# Check command line for paths to load, only the last one is shown and loaded straight away
+	for i, file_name in enumerate(args.files):
 		path = pathlib.Path(file_name)
-		ide_window.openFile(path)
+		ide_window.openFile(path, activate=i == len(args.files) - 1)
 
 	# Application loop
 	logger.debug("Entering main application loop..")
@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app():
+	QApplication = pytest.importorskip("PySide2.QtWidgets").QApplication
+
+	os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+	return QApplication.instance() or QApplication([])
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from ide import bitconv
+
+
+widths = [1, 2, 3, 4, 5, 6, 7, 8, 16]
+
+
+def scalar_pack(values, size_in_bytes: int, byteorder: str, signed: bool):
+	# The scalar functions are little endian, big endian output reverses each value
+	pack = bitconv.pack_int if signed else bitconv.pack_uint
+	packed = [bytes(pack(n, size_in_bytes)) for n in values]
+	if byteorder == ">":
+		packed = [data[::-1] for data in packed]
+	return b"".join(packed)
+
+
+def scalar_unpack(data, size_in_bytes: int, byteorder: str, signed: bool):
+	unpack = bitconv.unpack_int if signed else bitconv.unpack_uint
+	chunks = [data[i:i + size_in_bytes] for i in range(0, len(data), size_in_bytes)]
+	if byteorder == ">":
+		chunks = [chunk[::-1] for chunk in chunks]
+	return [unpack(chunk) for chunk in chunks]
+
+
+def random_values(size_in_bytes: int, signed: bool, count: int = 1000):
+	rng = random.Random(size_in_bytes)
+	bits = size_in_bytes * 8
+	bias = 1 << (bits - 1) if signed else 0
+
+	# The extremes, where sign extension and masking go wrong, then random ones
+	values = [-bias, (1 << bits) - 1 - bias, 0, -1 if signed else 1]
+	values += [rng.getrandbits(bits) - bias for _ in range(count)]
+	return values
+
+
+@pytest.mark.parametrize("size_in_bytes", widths)
+@pytest.mark.parametrize("signed", [False, True])
+@pytest.mark.parametrize("byteorder", ["<", ">"])
+def test_ints_match_scalar(size_in_bytes, signed, byteorder):
+	pack = bitconv.pack_ints if signed else bitconv.pack_uints
+	unpack = bitconv.unpack_ints if signed else bitconv.unpack_uints
+	values = random_values(size_in_bytes, signed)
+
+	packed = pack(values, size_in_bytes, byteorder)
+	assert packed == scalar_pack(values, size_in_bytes, byteorder, signed)
+	assert list(unpack(packed, size_in_bytes, byteorder)) == scalar_unpack(packed, size_in_bytes, byteorder, signed) == values
+
+
+@pytest.mark.parametrize("size_in_bytes", widths)
+@pytest.mark.parametrize("signed", [False, True])
+@pytest.mark.parametrize("byteorder", ["<", ">"])
+def test_unpack_window(size_in_bytes, signed, byteorder):
+	pack = bitconv.pack_ints if signed else bitconv.pack_uints
+	unpack = bitconv.unpack_ints if signed else bitconv.unpack_uints
+	values = random_values(size_in_bytes, signed, 100)
+
+	# Starting off the value grid, with bytes to spare at the end
+	data = b"\xa5" * 3 + pack(values, size_in_bytes, byteorder) + b"\xa5" * 5
+
+	assert list(unpack(data, size_in_bytes, byteorder, 3, 10)) == values[:10]
+	assert list(unpack(data, size_in_bytes, byteorder, 3 + size_in_bytes * 2, 0)) == []
+	assert list(unpack(data[:-5], size_in_bytes, byteorder, 3)) == values
+
+
+@pytest.mark.parametrize("size_in_bytes", widths)
+@pytest.mark.parametrize("signed", [False, True])
+def test_pack_overflow(size_in_bytes, signed):
+	pack = bitconv.pack_ints if signed else bitconv.pack_uints
+	bits = size_in_bytes * 8
+	low, high = (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if signed else (0, (1 << bits) - 1)
+
+	pack([low, high], size_in_bytes, "<")
+	with pytest.raises(OverflowError):
+		pack([0, high + 1], size_in_bytes, "<")
+	with pytest.raises(OverflowError):
+		pack([low - 1], size_in_bytes, ">")
+
+
+@pytest.mark.parametrize("size_in_bytes", [4, 8])
+@pytest.mark.parametrize("byteorder", ["<", ">"])
+def test_floats_match_scalar(size_in_bytes, byteorder):
+	rng = random.Random(0)
+	values = [rng.random() for _ in range(100)]
+
+	name = ("pack_float" if size_in_bytes == 4 else "pack_double") + ("_le" if byteorder == "<" else "_be")
+	scalar = getattr(bitconv, name)
+
+	packed = bitconv.pack_floats(values, size_in_bytes, byteorder)
+	assert packed == b"".join(scalar(x) for x in values)
+	assert list(bitconv.unpack_floats(packed, size_in_bytes, byteorder)) == pytest.approx(values, rel=1e-6)
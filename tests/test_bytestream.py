@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+from ide.io.bytestream import BytesOutStream
+
+
+def test_getvalue_with_output():
+	stream = BytesOutStream(io.BytesIO(), block_size=4)
+
+	offset = stream.reserve(4)
+	stream.bytes(b"abcdefgh")
+
+	with pytest.raises(ValueError):
+		stream.getvalue()
+
+	stream.patch(offset, b"\x08\x00\x00\x00")
+	assert stream.getvalue() == b"\x08\x00\x00\x00abcdefgh"
+
+
+def test_getvalue_after_seeking_back():
+	stream = BytesOutStream(io.BytesIO())
+
+	stream.bytes(b"abcdef")
+	stream.seek(2)
+	stream.bytes(b"X")
+
+	assert stream.getvalue() == b"abXdef"
+
+
+def test_getvalue_then_write_after_seeking_back():
+	output = io.BytesIO()
+	stream = BytesOutStream(output)
+
+	stream.bytes(b"abcdef")
+	stream.seek(2)
+	assert stream.getvalue() == b"abcdef"
+
+	stream.bytes(b"X")
+	assert stream.tell() == 3
+	assert stream.getvalue() == b"abXdef"
+
+	stream.close()
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+pytest.importorskip("PySide2")
+
+from ide.ui.codeeditor import CodeEditor
+from ide.ui.documents import CodeDocument, TextDocument
+
+
+def test_plain_text_document(app, tmp_path):
+	path = tmp_path / "notes.txt"
+	path.write_text("first line\nsecond line\n")
+
+	document = TextDocument(path)
+	document.reload()
+
+	editor = CodeEditor()
+	editor.setDocument(document)
+
+	assert document.language() is None
+	assert editor.document() is document
+	assert editor.toPlainText() == "first line\nsecond line\n"
+
+
+def test_code_document(app, tmp_path):
+	path = tmp_path / "module.py"
+	path.write_text("x = 1\n")
+
+	document = CodeDocument(path)
+	document.reload()
+
+	editor = CodeEditor()
+	editor.setDocument(document)
+
+	assert document.language() is not None
+	assert editor.toPlainText() == "x = 1\n"
+
+
+def highlighted(app, document, deadline: float = 5):
+	# Runs the event loop until idle highlighting has reached the last block
+	from ide.ui.codeeditor.highlighter import SyntaxHighlighter
+
+	end = time.monotonic() + deadline
+	while document.lastBlock().userState() < SyntaxHighlighter.Clean and time.monotonic() < end:
+		app.processEvents()
+
+
+def colours(block):
+	return [(f.start, f.length, f.format.foreground().color()) for f in block.layout().formats()]
+
+
+def test_string_continued_with_backslash(app, tmp_path):
+	from ide.lexing.token import TokenType
+	from ide.ui.codeeditor.highlighter import SyntaxHighlighter
+
+	path = tmp_path / "module.py"
+	path.write_text("x = 'abc\\\ndef'\ny = 1\n")
+
+	document = CodeDocument(path)
+	document.reload()
+
+	editor = CodeEditor()
+	editor.setDocument(document)
+	highlighted(app, document.document())
+
+	string = SyntaxHighlighter.tokenFormats[TokenType.String].foreground().color()
+	number = SyntaxHighlighter.tokenFormats[TokenType.Number].foreground().color()
+
+	second = document.document().findBlockByNumber(1)
+	third = second.next()
+
+	assert colours(second) == [(0, 4, string)]
+	assert (4, 1, number) in colours(third)
+
+
+def test_open_lexes_only_the_top(app, tmp_path):
+	from ide.ui.codeeditor.highlighter import SyntaxHighlighter
+
+	path = tmp_path / "big.py"
+	path.write_text("x = foo(1, 'a')  # c\n" * 20000)
+
+	document = CodeDocument(path)
+	document.reload()
+
+	editor = CodeEditor()
+	editor.resize(600, 400)
+	editor.setDocument(document)
+	app.processEvents()
+
+	# Most blocks are left to idle time rather than all run through highlightBlock at once
+	assert document.document().lastBlock().userState() == SyntaxHighlighter.Unlexed
+	assert document.document().firstBlock().userState() == SyntaxHighlighter.Clean
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("PySide2")
+
+from PySide2.QtCore import QSize, Qt
+from PySide2.QtGui import QImage
+
+from ide.ui.documents import ImageDocument
+from ide.ui.documents.imaging import decode_image
+
+
+@pytest.fixture(params=["png", "jpg"])
+def image_path(request, tmp_path):
+	image = QImage(400, 300, QImage.Format_RGB32)
+	image.fill(Qt.darkCyan)
+
+	path = tmp_path / f"picture.{request.param}"
+	assert image.save(str(path))
+	return path
+
+
+def test_decode_at_target_size(app, image_path):
+	assert decode_image(image_path, QSize(100, 100)).size() == QSize(100, 75)
+	assert decode_image(image_path, QSize(1000, 1000)).size() == QSize(400, 300)
+	assert decode_image(image_path).size() == QSize(400, 300)
+
+
+def test_pixmap_cache_hit(app, image_path):
+	first = ImageDocument(image_path)
+	first.setTargetSize(QSize(100, 100))
+	first.reload()
+	assert first.pixmap().size() == QSize(100, 75)
+
+	# A second document for the same file and size takes the pixmap from the cache without decoding
+	second = ImageDocument(image_path)
+	second.setTargetSize(QSize(100, 100))
+	second.beginLoad()
+
+	assert list(second.readChunks()) == []
+	assert second.pixmap().cacheKey() == first.pixmap().cacheKey()
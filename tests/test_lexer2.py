@@ -0,0 +1,34 @@
+import random
+
+from ide.lang.python import Python
+from ide.lexing.lexer2 import Lexer
+from ide.lexing.token import TokenList
+
+
+def spans(tokens):
+	return [(token.type, token.start_pos, token.end_pos, token.value) for token in tokens]
+
+
+def test_update_token_list(monkeypatch):
+	# Small blocks so edits cross block boundaries
+	monkeypatch.setattr(TokenList, "block_size", 4)
+
+	context = Python.lexer()
+	pieces = ["x", " ", "\n", "'", "'''", "#", "1", "abc", "\\", "(", "def ", "\t"]
+	rng = random.Random(0)
+
+	for _ in range(100):
+		text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 60)))
+		lexer = Lexer(context, text)
+		tokens = TokenList(lexer.tokens())
+
+		for _ in range(10):
+			offset = rng.randint(0, len(lexer.text))
+			removed = rng.randint(0, min(5, len(lexer.text) - offset))
+			inserted = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 3)))
+
+			lexer.update(tokens, offset, removed, inserted)
+
+			expected = spans(Lexer(context, lexer.text).tokens())
+			assert spans(tokens) == expected
+			assert spans(tokens[i] for i in range(len(tokens))) == expected
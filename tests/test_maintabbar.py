@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+pytest.importorskip("PySide2")
+
+from ide.ui.documents import BinaryDocument
+from ide.ui.maintabbar import MainTabBar
+
+
+def binary_document(tmp_path):
+	path = tmp_path / "data.bin"
+	path.write_bytes(bytes(range(256)) * 4)
+
+	document = BinaryDocument(path)
+	document.reload()
+	return document
+
+
+def test_close_tab_closes_binary_document(app, tmp_path):
+	tabs = MainTabBar(None)
+	document = binary_document(tmp_path)
+
+	editor = tabs.openDocument(document)
+	assert document.size() == 1024
+
+	tabs.closeTab(tabs.indexOf(editor))
+
+	assert document.size() == 0
+	assert tabs.indexOf(editor) < 0
+
+
+def test_unload_closes_binary_document(app, tmp_path):
+	tabs = MainTabBar(None)
+	document = binary_document(tmp_path)
+
+	editor = tabs.openDocument(document)
+	index = tabs.indexOf(editor)
+	tabs.unload(index)
+
+	assert document.size() == 0
+
+	# Mapped again when the tab comes back
+	tabs.materialize(index)
+
+	deadline = time.monotonic() + 5
+	while tabs.loaders and time.monotonic() < deadline:
+		app.processEvents()
+
+	assert tabs.widget(index).document() is document
+	assert document.size() == 1024
+
+
+def test_unloaded_new_tab_keeps_its_name(app):
+	tabs = MainTabBar(None)
+
+	editor = tabs.createEditor()
+	editor.setPlainText("not saved yet")
+	index = tabs.indexOf(editor)
+	name = tabs.tabText(index)
+	icon = tabs.tabIcon(index).cacheKey()
+
+	tabs.unload(index)
+	widget = tabs.materialize(index)
+
+	assert tabs.indexOf(widget) == index
+	assert tabs.tabText(index) == name == "new 1"
+	assert tabs.tabIcon(index).cacheKey() == icon
+	assert widget.toPlainText() == "not saved yet"
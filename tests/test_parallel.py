@@ -0,0 +1,22 @@
+import random
+
+from ide.lang.python import Python
+from ide.lexing.lexer2 import Lexer
+from ide.lexing.parallel import ParallelLexer
+
+
+def spans(table):
+	return list(table.starts), list(table.ends), list(table.types)
+
+
+def test_matches_serial():
+	context = Python.lexer()
+	pieces = ["x", " ", "\n", "'", "'''", '"""', "#", "1", "abc", "\\", "(", "def ", "\t"]
+	rng = random.Random(0)
+
+	for _ in range(5):
+		text = "".join(rng.choice(pieces) for _ in range(3000))
+
+		# Pieces and overlaps small enough for tokens to run past both
+		lexer = ParallelLexer(context, text, chunk_size=rng.randint(20, 200), max_workers=2, overlap=rng.randint(1, 40))
+		assert spans(lexer.table()) == spans(Lexer(context, text).table())
@@ -0,0 +1,51 @@
+import pytest
+
+from ide.lang.python import Python
+from ide.lexing.lexer2 import Lexer
+from ide.lexing.stream import StreamLexer
+
+
+def spans(tokens):
+	return [(token.type, token.start_pos, token.end_pos) for token in tokens]
+
+
+@pytest.mark.parametrize("text", [
+	"x = '''doc\nfoo\\nbar'''\ny = 1\n",
+	"x = '''never closed\nfoo\nbar\n",
+	"s = 'abc\\\n\"\"\"x\"\"\" # comment\r\n\r\n  y = 1.5e3 ** z\\\n",
+	"é = 'ü'\n\tπ(…)\n'abc\\",
+])
+def test_chunked_matches_whole_text(text):
+	context = Python.lexer()
+	expected = spans(Lexer(context, text).table())
+
+	for chunk_size in range(1, len(text) + 1):
+		# str chunks so the sizes are in characters
+		chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+		assert spans(StreamLexer(context, chunks).tokens()) == expected, chunk_size
+
+	# Bytes split inside multi-byte characters too
+	data = text.encode("utf-8")
+	for chunk_size in range(1, len(data) + 1):
+		assert spans(StreamLexer(context, data, chunk_size=chunk_size).tokens()) == expected, chunk_size
+
+
+def test_carry_is_bounded():
+	context = Python.lexer()
+	text = "x = '''" + "a" * 1000
+
+	tokens = list(StreamLexer(context, text.encode(), chunk_size=10, max_carry=100).tokens())
+
+	# The unterminated string is cut rather than held whole, and nothing is lost
+	assert "".join(token.value for token in tokens) == text
+	assert max(token.end_pos - token.start_pos for token in tokens) <= 100 + 10
+
+
+def test_large_chunk_splitting_a_string():
+	context = Python.lexer()
+	text = "x = 1\n" * 20 + "s = '" + "a" * 100 + "'\n" + "y = 2\n" * 20
+
+	# Chunks bigger than max_carry, the first one ending inside the string literal
+	tokens = StreamLexer(context, text.encode(), chunk_size=150, max_carry=64).tokens()
+
+	assert spans(tokens) == spans(Lexer(context, text).table())
@@ -0,0 +1,74 @@
+import functools
+import http.server
+import threading
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from ide.io import Fetch, HttpCache
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+	def log_message(self, *args):
+		pass
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+	# Serves a directory, with Last-Modified and 304 answers to If-Modified-Since
+	root = tmp_path_factory.mktemp("www")
+	(root / "page.txt").write_bytes(b"hello " * 50000)
+
+	handler = functools.partial(_Handler, directory=str(root))
+	httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+	thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+	thread.start()
+
+	yield f"http://127.0.0.1:{httpd.server_port}/", root
+
+	httpd.shutdown()
+	httpd.server_close()
+
+
+def test_fetch_then_revalidate(server, tmp_path):
+	base, root = server
+	cache = HttpCache(tmp_path / "cache")
+
+	fetch = Fetch(base + "page.txt", cache)
+	assert b"".join(fetch) == (root / "page.txt").read_bytes()
+	assert not fetch.cached
+	assert cache.lookup(base + "page.txt") is not None
+
+	fetch = Fetch(base + "page.txt", cache)
+	assert b"".join(fetch) == (root / "page.txt").read_bytes()
+	assert fetch.cached
+	assert fetch.size == (root / "page.txt").stat().st_size
+
+
+def test_not_modified_without_cache_entry(server, tmp_path, monkeypatch):
+	base, root = server
+	cache = HttpCache(tmp_path / "cache")
+	url = base + "page.txt"
+	b"".join(Fetch(url, cache))
+
+	# The entry is evicted after the conditional request headers were built
+	validators = HttpCache.validators
+
+	def evicting_validators(self, url):
+		headers = validators(self, url)
+		self.body(url).unlink()
+		return headers
+
+	monkeypatch.setattr(HttpCache, "validators", evicting_validators)
+
+	fetch = Fetch(url, cache)
+	assert b"".join(fetch) == (root / "page.txt").read_bytes()
+	assert not fetch.cached
+
+
+def test_missing_page(server, tmp_path):
+	base, _ = server
+
+	with pytest.raises(requests.HTTPError):
+		b"".join(Fetch(base + "missing.txt", HttpCache(tmp_path / "cache")))